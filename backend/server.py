@@ -1,4 +1,5 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, UploadFile, File
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
@@ -6,11 +7,31 @@ from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
-from typing import List, Optional, Literal
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, AfterValidator, ValidationError
+from pymongo import UpdateOne, DeleteOne, ReplaceOne, IndexModel, ReturnDocument, ASCENDING, DESCENDING, TEXT
+from pymongo.collation import Collation
+from pymongo.errors import DuplicateKeyError, OperationFailure, BulkWriteError
+from typing import List, Optional, Literal, Annotated
 import uuid
 from datetime import datetime, timezone, timedelta
 import asyncio
+import base64
+import json
+import orjson
+import hashlib
+import hmac
+import io
+import csv
+import codecs
+import re
+import time
+import bisect
+import math
+import unicodedata
+import calendar
+from urllib.parse import unquote
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import resend
 from emergentintegrations.llm.chat import LlmChat, UserMessage
 import jwt
@@ -20,7 +41,7 @@ ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(mongo_url, tz_aware=True)
 db = client[os.environ['DB_NAME']]
 
 resend.api_key = os.environ.get('RESEND_API_KEY')
@@ -28,14 +49,151 @@ SENDER_EMAIL = os.environ.get('SENDER_EMAIL', 'onboarding@resend.dev')
 EMERGENT_KEY = os.environ.get('EMERGENT_LLM_KEY')
 JWT_SECRET = os.environ.get('JWT_SECRET', 'meu-fluxo-secret-key-change-in-production')
 JWT_ALGORITHM = 'HS256'
+RECURRING_INTERVAL_SECONDS = int(os.environ.get('RECURRING_INTERVAL_SECONDS', '3600'))
+RECURRING_HORIZON_DAYS = int(os.environ.get('RECURRING_HORIZON_DAYS', '90'))
+REMINDER_TRANSPORT = os.environ.get('REMINDER_TRANSPORT', 'resend')
+REMINDER_INTERVAL_SECONDS = int(os.environ.get('REMINDER_INTERVAL_SECONDS', '300'))
+REMINDER_CONCURRENCY = int(os.environ.get('REMINDER_CONCURRENCY', '4'))
+REMINDER_RATE_PER_SECOND = float(os.environ.get('REMINDER_RATE_PER_SECOND', '2'))
+REMINDER_MAX_RETRIES = int(os.environ.get('REMINDER_MAX_RETRIES', '3'))
+REMINDER_LOOKBACK_DAYS = int(os.environ.get('REMINDER_LOOKBACK_DAYS', '1'))
+TIPS_CACHE_BACKEND = os.environ.get('TIPS_CACHE_BACKEND', 'memory')
+TIPS_CACHE_TTL_SECONDS = int(os.environ.get('TIPS_CACHE_TTL_SECONDS', '21600'))
+TIPS_CACHE_MAX_ENTRIES = int(os.environ.get('TIPS_CACHE_MAX_ENTRIES', '1000'))
+TIPS_PRECOMPUTE_HOUR = int(os.environ.get('TIPS_PRECOMPUTE_HOUR', '3'))
+TIPS_PRECOMPUTE_CONCURRENCY = int(os.environ.get('TIPS_PRECOMPUTE_CONCURRENCY', '4'))
+TIPS_PRECOMPUTE_MAX_CALLS = int(os.environ.get('TIPS_PRECOMPUTE_MAX_CALLS', '500'))
+TIPS_LLM_RATE_PER_SECOND = float(os.environ.get('TIPS_LLM_RATE_PER_SECOND', '1'))
+TIPS_ACTIVE_DAYS = int(os.environ.get('TIPS_ACTIVE_DAYS', '7'))
+TIPS_DRIFT_THRESHOLD = float(os.environ.get('TIPS_DRIFT_THRESHOLD', '0.1'))
+BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+BCRYPT_WORKERS = int(os.environ.get('BCRYPT_WORKERS', str(min(4, os.cpu_count() or 1))))
+BCRYPT_MAX_QUEUE = int(os.environ.get('BCRYPT_MAX_QUEUE', '64'))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+AUTH_CACHE_TTL_SECONDS = int(os.environ.get('AUTH_CACHE_TTL_SECONDS', '300'))
+AUTH_CACHE_MAX_ENTRIES = int(os.environ.get('AUTH_CACHE_MAX_ENTRIES', '10000'))
+SEARCH_LANGUAGE = os.environ.get('SEARCH_LANGUAGE', 'portuguese')
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CHANGE_LOG_RETENTION_DAYS', '30'))
+SYNC_BATCH_SIZE = int(os.environ.get('SYNC_BATCH_SIZE', '5000'))
+SYNC_GAP_GRACE_SECONDS = 30
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', '64'))
+EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('EVENTS_HEARTBEAT_SECONDS', '25'))
+EVENTS_TOKEN_SECONDS = int(os.environ.get('EVENTS_TOKEN_SECONDS', '60'))
+DASHBOARD_UPCOMING_DAYS = int(os.environ.get('DASHBOARD_UPCOMING_DAYS', '3'))
+DASHBOARD_SCHEDULED_LIMIT = int(os.environ.get('DASHBOARD_SCHEDULED_LIMIT', '50'))
+BUDGET_ALERT_THRESHOLD = float(os.environ.get('BUDGET_ALERT_THRESHOLD', '0.8'))
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 api_router = APIRouter(prefix="/api")
 security = HTTPBearer()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def ensure_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+UtcDatetime = Annotated[datetime, AfterValidator(ensure_utc)]
+
+# case- and accent-insensitive, the closest server-side match for fold_text
+SEARCH_TERM_COLLATION = Collation(locale="pt", strength=1)
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("last_active_at", ASCENDING)], name="last_active_at"),
+    ],
+    "transactions": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel(
+            [("user_id", ASCENDING), ("date", DESCENDING), ("order_index", ASCENDING), ("id", ASCENDING)],
+            name="user_id_date_order"
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("date", ASCENDING)],
+            name="pending_reminders",
+            partialFilterExpression={"has_reminder": True, "reminder_sent": False}
+        ),
+        IndexModel(
+            [("date", ASCENDING)],
+            name="due_reminders",
+            partialFilterExpression={"has_reminder": True, "reminder_sent": False}
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("import_hash", ASCENDING)],
+            name="user_id_import_hash",
+            unique=True,
+            partialFilterExpression={"import_hash": {"$exists": True}}
+        ),
+        IndexModel(
+            [("recurring_id", ASCENDING), ("date", ASCENDING)],
+            name="recurring_id_date",
+            unique=True,
+            partialFilterExpression={"recurring_id": {"$type": "string"}}
+        ),
+        # refresh_search_term looks up the latest use of a term with SEARCH_TERM_COLLATION
+        *(
+            IndexModel(
+                [("user_id", ASCENDING), (field, ASCENDING), ("date", DESCENDING)],
+                name=f"user_id_{field}_date_pt",
+                collation=SEARCH_TERM_COLLATION
+            )
+            for field in ("description", "category")
+        ),
+        IndexModel(
+            [("user_id", ASCENDING), ("description", TEXT), ("category", TEXT)],
+            name="user_id_text",
+            weights={"description": 2, "category": 1},
+            default_language=SEARCH_LANGUAGE
+        ),
+    ],
+    "budgets": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+    ],
+    "templates": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+    ],
+    "recurring_transactions": [
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("active", ASCENDING), ("materialized_until", ASCENDING)], name="active_materialized_until"),
+    ],
+    "precomputed_tips": [
+        IndexModel([("user_id", ASCENDING), ("period", ASCENDING)], name="user_id_period", unique=True),
+    ],
+    "tips_cache": [
+        IndexModel([("key", ASCENDING)], name="key_unique", unique=True),
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "startup_locks": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "monthly_rollups": [
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_id_month", unique=True),
+    ],
+    "change_log": [
+        IndexModel([("user_id", ASCENDING), ("seq", ASCENDING)], name="user_id_seq", unique=True),
+        IndexModel([("at", ASCENDING)], name="at_ttl", expireAfterSeconds=CHANGE_LOG_RETENTION_DAYS * 86400),
+    ],
+    "budget_counters": [
+        IndexModel(
+            [("user_id", ASCENDING), ("period", ASCENDING), ("bucket", ASCENDING), ("category", ASCENDING)],
+            name="user_id_period_bucket_category",
+            unique=True
+        ),
+    ],
+    "search_terms": [
+        IndexModel([("user_id", ASCENDING), ("key", ASCENDING), ("field", ASCENDING)], name="user_id_key_field", unique=True),
+    ],
+}
+
+def model_projection(model) -> dict:
+    return {"_id": 0, **{field: 1 for field in model.model_fields}}
+
+TRANSACTION_SORT = [("date", DESCENDING), ("order_index", ASCENDING), ("id", ASCENDING)]
+
 class User(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -63,13 +221,17 @@ class LoginResponse(BaseModel):
     token: str
     user: UserResponse
 
+class StreamTokenResponse(BaseModel):
+    token: str
+    expires_in: int
+
 class Transaction(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     user_id: str
     amount: float
-    date: str
+    date: UtcDatetime
     type: Literal["entrada", "saida"]
     category: str
     description: str
@@ -93,12 +255,14 @@ class RecurringTransaction(BaseModel):
     day_of_month: Optional[int] = None
     start_date: str
     end_date: Optional[str] = None
+    has_reminder: bool = False
     active: bool = True
+    materialized_until: Optional[datetime] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class TransactionCreate(BaseModel):
     amount: float
-    date: str
+    date: UtcDatetime
     type: Literal["entrada", "saida"]
     category: str
     description: str
@@ -111,7 +275,7 @@ class TransactionCreate(BaseModel):
 
 class TransactionUpdate(BaseModel):
     amount: Optional[float] = None
-    date: Optional[str] = None
+    date: Optional[UtcDatetime] = None
     type: Optional[Literal["entrada", "saida"]] = None
     category: Optional[str] = None
     description: Optional[str] = None
@@ -121,7 +285,8 @@ class PeriodStats(BaseModel):
     total_income: float
     total_expense: float
     balance: float
-    transactions: List[Transaction]
+    transactions: List[Transaction] = []
+    scheduled: List[Transaction] = []
 
 class TipsRequest(BaseModel):
     period: Literal["week", "month", "year"]
@@ -160,6 +325,58 @@ class PeriodComparison(BaseModel):
     expense_change: float
     balance_change: float
 
+class RangeGroup(BaseModel):
+    key: str
+    income: float
+    expense: float
+    count: int
+
+class RangeBucket(BaseModel):
+    key: str
+    start: datetime
+    income: float
+    expense: float
+    balance: float
+    count: int
+    groups: List[RangeGroup] = []
+
+class RangeTrendPeriod(BaseModel):
+    start: datetime
+    end: datetime
+    income: float
+    expense: float
+    balance: float
+
+class RangeStats(BaseModel):
+    start: datetime
+    end: datetime
+    granularity: Literal["day", "week", "month"]
+    group_by: Optional[Literal["category", "type"]] = None
+    total_income: float
+    total_expense: float
+    balance: float
+    series: List[RangeBucket]
+    trend: List[RangeTrendPeriod] = []
+
+class BudgetStatus(BaseModel):
+    budget_id: str
+    category: str
+    period: Literal["month", "year"]
+    bucket: str
+    limit: float
+    spent: float
+    remaining: float
+    percentage: float
+    threshold_crossed: bool
+    exceeded: bool
+
+class DashboardData(BaseModel):
+    week: PeriodStats
+    transactions: List[Transaction]
+    upcoming: List[Transaction]
+    scheduled: List[Transaction]
+    budget_alerts: List[BudgetStatus]
+
 class TransactionTemplate(BaseModel):
     model_config = ConfigDict(extra="ignore")
     
@@ -182,12 +399,146 @@ class TemplateCreate(BaseModel):
 class ReorderRequest(BaseModel):
     transaction_ids: List[str]
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+class BatchDeleteRequest(BaseModel):
+    transaction_ids: List[str]
+
+class BatchUpdateRequest(BaseModel):
+    transaction_ids: List[str]
+    update: TransactionUpdate
+
+class BatchItemResult(BaseModel):
+    id: str
+    status: Literal["deleted", "updated", "conflict", "not_found"]
+
+class BatchResult(BaseModel):
+    processed: int
+    results: List[BatchItemResult]
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+class SearchSuggestion(BaseModel):
+    field: Literal["description", "category"]
+    text: str
+    count: int
+    category: Optional[str] = None
+    amount: Optional[float] = None
+    type: Optional[Literal["entrada", "saida"]] = None
+
+class ImportResult(BaseModel):
+    total_rows: int
+    imported: int
+    duplicates: int
+    failed: int
+    errors: List[ImportRowError]
+    elapsed_seconds: float
+    rows_per_second: float
+
+class SyncChanges(BaseModel):
+    transactions: List[Transaction] = []
+    budgets: List[Budget] = []
+    templates: List[TransactionTemplate] = []
+    recurring: List[RecurringTransaction] = []
+
+class SyncDeleted(BaseModel):
+    transactions: List[str] = []
+    budgets: List[str] = []
+    templates: List[str] = []
+    recurring: List[str] = []
+
+class SyncResponse(BaseModel):
+    token: int
+    full: bool
+    has_more: bool
+    changes: SyncChanges
+    deleted: SyncDeleted
 
-def verify_password(password: str, hashed: str) -> bool:
+TRANSACTION_PROJECTION = model_projection(Transaction)
+BUDGET_PROJECTION = model_projection(Budget)
+TEMPLATE_PROJECTION = model_projection(TransactionTemplate)
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+    
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+    
+    def set(self, key, value, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        self.entries[key] = (value, time.monotonic() + ttl)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def delete(self, key):
+        self.entries.pop(key, None)
+
+class PasswordHashMetrics(BaseModel):
+    workers: int
+    rounds: int
+    pending: int = 0
+    max_pending: int = 0
+    completed: int = 0
+    rejected: int = 0
+    upgraded: int = 0
+    total_seconds: float = 0.0
+    average_ms: float = 0.0
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, rounds: int):
+        self.rounds = rounds
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.metrics = PasswordHashMetrics(workers=workers, rounds=rounds)
+    
+    async def run(self, function, *args):
+        if self.metrics.pending >= self.max_queue:
+            self.metrics.rejected += 1
+            raise HTTPException(status_code=503, detail="Servidor ocupado, tente novamente em instantes")
+        
+        self.metrics.pending += 1
+        self.metrics.max_pending = max(self.metrics.max_pending, self.metrics.pending)
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+        finally:
+            self.metrics.pending -= 1
+            self.metrics.completed += 1
+            self.metrics.total_seconds += time.perf_counter() - started
+            self.metrics.average_ms = self.metrics.total_seconds / self.metrics.completed * 1000
+    
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+password_hasher = PasswordHasher(BCRYPT_WORKERS, BCRYPT_MAX_QUEUE, BCRYPT_ROUNDS)
+
+def bcrypt_hash(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def bcrypt_verify(password: str, hashed: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
 
+def password_rounds(hashed: str) -> int:
+    return int(hashed.split('$')[2])
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(bcrypt_hash, password, password_hasher.rounds)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.run(bcrypt_verify, password, hashed)
+
 def create_token(user_id: str) -> str:
     payload = {
         'user_id': user_id,
@@ -195,19 +546,135 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+STREAM_TOKEN_PURPOSE = "events"
+
+def create_stream_token(user_id: str) -> str:
+    # EventSource can't send headers, so the token ends up in URLs and access logs;
+    # it only opens /events and expires before it is worth stealing
+    payload = {
+        'user_id': user_id,
+        'purpose': STREAM_TOKEN_PURPOSE,
+        'exp': datetime.now(timezone.utc) + timedelta(seconds=EVENTS_TOKEN_SECONDS)
+    }
+    return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+
+token_cache = LRUCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+user_cache = LRUCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
+
+def invalidate_user_cache(user_id: str):
+    # every write to a user document drops this worker's cached profile; only data_version
+    # bumps skip it, since the profile never holds the counter
+    user_cache.delete(user_id)
+
+async def record_activity(user_id: str):
+    await db.users.update_one({"id": user_id}, {"$set": {"last_active_at": datetime.now(timezone.utc)}})
+    invalidate_user_cache(user_id)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
+    return decode_user_token(credentials.credentials)
+
+async def get_stream_user(request: Request, token: Optional[str] = None) -> str:
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        return decode_user_token(credentials)
+    if token:
+        return decode_stream_token(token)
+    raise HTTPException(status_code=401, detail="Token inválido")
+
+def decode_stream_token(token: str) -> str:
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"require": ["exp"]})
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=401, detail="Token expirado")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=401, detail="Token inválido")
+    if payload.get('purpose') != STREAM_TOKEN_PURPOSE or not payload.get('user_id'):
+        raise HTTPException(status_code=401, detail="Token inválido")
+    return payload['user_id']
+
+def decode_user_token(token: str) -> str:
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+    try:
+        # create_token always sets exp, and the cache entry must not outlive it
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM], options={"require": ["exp"]})
         user_id = payload.get('user_id')
-        if not user_id:
+        # stream tokens open /events only
+        if not user_id or payload.get('purpose'):
             raise HTTPException(status_code=401, detail="Token inválido")
+        token_cache.set(token, user_id, payload['exp'] - time.time())
         return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expirado")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Token inválido")
 
+async def require_metrics_token(request: Request):
+    # process-wide counters are for operators, not for any signed-in user; unset disables them
+    token = request.headers.get("x-metrics-token")
+    if not METRICS_TOKEN or not token or not hmac.compare_digest(token.encode('utf-8'), METRICS_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+async def get_current_user_profile(user_id: str = Depends(get_current_user)) -> UserResponse:
+    user = user_cache.get(user_id)
+    if user is not None:
+        return user
+    doc = await db.users.find_one({"id": user_id}, {"_id": 0, "id": 1, "email": 1, "name": 1})
+    if not doc:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    user = UserResponse(**doc)
+    user_cache.set(user_id, user)
+    return user
+
+async def record_changes(user_id: str, entity: str, upserted: List[str] = (), deleted: List[str] = ()):
+    changes = [(entity_id, "upsert") for entity_id in upserted] + [(entity_id, "delete") for entity_id in deleted]
+    if not changes:
+        return
+    now = datetime.now(timezone.utc)
+    user = await db.users.find_one_and_update(
+        {"id": user_id},
+        {"$inc": {"data_version": len(changes)}, "$set": {"data_version_at": now}},
+        projection={"_id": 0, "data_version": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    if not user:
+        return
+    first_seq = user['data_version'] - len(changes) + 1
+    await db.change_log.insert_many([
+        {"user_id": user_id, "seq": first_seq + i, "entity": entity, "entity_id": entity_id, "op": op, "at": now}
+        for i, (entity_id, op) in enumerate(changes)
+    ])
+    event_hub.publish(user_id, user['data_version'], {
+        "entity": entity,
+        "upserted": list(upserted),
+        "deleted": list(deleted)
+    })
+
+async def get_data_version(user_id: str) -> int:
+    doc = await db.users.find_one({"id": user_id}, {"_id": 0, "data_version": 1})
+    return (doc or {}).get('data_version', 0)
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+async def versioned_etag(request: Request, user_id: str, window: str) -> str:
+    version = await get_data_version(user_id)
+    etag = 'W/"' + hashlib.sha256(f"{user_id}:{version}:{window}".encode('utf-8')).hexdigest()[:20] + '"'
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        if "*" in candidates or etag.removeprefix("W/") in candidates:
+            raise HTTPException(status_code=304, headers=etag_headers(etag))
+    return etag
+
+async def data_version_etag(request: Request, user_id: str = Depends(get_current_user)) -> str:
+    return await versioned_etag(request, user_id, datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+
+async def hourly_data_version_etag(request: Request, user_id: str = Depends(get_current_user)) -> str:
+    # reads bounded at "now" (upcoming, reminders, period totals) change as the clock moves, not only on writes
+    return await versioned_etag(request, user_id, datetime.now(timezone.utc).strftime("%Y-%m-%dT%H"))
+
 @api_router.post("/auth/register", response_model=LoginResponse)
 async def register(input: UserRegister):
     existing = await db.users.find_one({"email": input.email}, {"_id": 0})
@@ -217,37 +684,340 @@ async def register(input: UserRegister):
     user_obj = User(
         email=input.email,
         name=input.name,
-        password_hash=hash_password(input.password)
+        password_hash=await hash_password(input.password)
     )
     
     doc = user_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.users.insert_one(doc)
+    doc['last_active_at'] = datetime.now(timezone.utc)
+    try:
+        await db.users.insert_one(doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email já cadastrado")
+    invalidate_user_cache(user_obj.id)
     
     token = create_token(user_obj.id)
-    return LoginResponse(
-        token=token,
-        user=UserResponse(id=user_obj.id, email=user_obj.email, name=user_obj.name)
-    )
+    return LoginResponse(token=token, user=UserResponse(id=user_obj.id, email=user_obj.email, name=user_obj.name))
 
 @api_router.post("/auth/login", response_model=LoginResponse)
 async def login(input: UserLogin):
     user = await db.users.find_one({"email": input.email}, {"_id": 0})
-    if not user or not verify_password(input.password, user['password_hash']):
+    if not user or not await verify_password(input.password, user['password_hash']):
         raise HTTPException(status_code=401, detail="Email ou senha incorretos")
     
+    updates = {"last_active_at": datetime.now(timezone.utc)}
+    if password_rounds(user['password_hash']) != password_hasher.rounds:
+        updates['password_hash'] = await hash_password(input.password)
+        password_hasher.metrics.upgraded += 1
+    await db.users.update_one({"id": user['id']}, {"$set": updates})
+    invalidate_user_cache(user['id'])
+    
     token = create_token(user['id'])
-    return LoginResponse(
-        token=token,
-        user=UserResponse(id=user['id'], email=user['email'], name=user['name'])
-    )
+    return LoginResponse(token=token, user=UserResponse(id=user['id'], email=user['email'], name=user['name']))
+
+@api_router.get("/auth/metrics", response_model=PasswordHashMetrics, dependencies=[Depends(require_metrics_token)])
+async def get_auth_metrics():
+    return password_hasher.metrics
 
 @api_router.get("/auth/me", response_model=UserResponse)
-async def get_me(user_id: str = Depends(get_current_user)):
-    user = await db.users.find_one({"id": user_id}, {"_id": 0})
-    if not user:
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-    return UserResponse(id=user['id'], email=user['email'], name=user['name'])
+async def get_me(user: UserResponse = Depends(get_current_user_profile)):
+    return user
+
+CHANGE_FIELDS = {"_id": 0, "id": 1, "date": 1, "type": 1, "category": 1, "description": 1, "amount": 1}
+
+def rollup_month(date: datetime) -> str:
+    return date.strftime("%Y-%m")
+
+def rollup_category_key(category: str) -> str:
+    return category.replace("%", "%25").replace(".", "%2E").replace("$", "%24")
+
+def add_increment(increments: dict, field: str, value):
+    increments[field] = increments.get(field, 0) + value
+
+def rollup_increments(transactions: List[dict], sign: int, increments: Optional[dict] = None) -> dict:
+    increments = {} if increments is None else increments
+    for t in transactions:
+        month_increments = increments.setdefault(rollup_month(t['date']), {})
+        field = "income" if t['type'] == "entrada" else "expense"
+        add_increment(month_increments, field, sign * t['amount'])
+        add_increment(month_increments, f"{field}_count", sign)
+        if t['type'] == "saida":
+            category_field = f"categories.{rollup_category_key(t['category'])}"
+            add_increment(month_increments, f"{category_field}.total", sign * t['amount'])
+            add_increment(month_increments, f"{category_field}.count", sign)
+    return increments
+
+async def record_rollup(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    increments = rollup_increments(removed, -1, rollup_increments(added, 1))
+    operations = []
+    for month, month_increments in increments.items():
+        month_increments = {k: v for k, v in month_increments.items() if v}
+        if month_increments:
+            operations.append(UpdateOne({"user_id": user_id, "month": month}, {"$inc": month_increments}, upsert=True))
+    if operations:
+        await db.monthly_rollups.bulk_write(operations, ordered=False)
+
+SUGGEST_HALF_LIFE_DAYS = 30
+SUGGEST_SCAN_LIMIT = 200
+SEARCH_TERM_FIELDS = ("description", "category")
+
+def fold_text(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value)
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).casefold().split())
+
+def search_term(t: dict, field: str) -> tuple:
+    term = " ".join((t.get(field) or "").split())
+    return term, fold_text(term)
+
+def search_term_entries(transactions: List[dict], sign: int, entries: Optional[dict] = None) -> dict:
+    entries = {} if entries is None else entries
+    for t in transactions:
+        for field in SEARCH_TERM_FIELDS:
+            term, key = search_term(t, field)
+            if not key:
+                continue
+            entry = entries.setdefault((field, key), {"count": 0})
+            entry['count'] += sign
+            if sign > 0 and (entry.get('last_used') is None or t['date'] >= entry['last_used']):
+                entry.update(term=term, last_used=t['date'])
+                if field == "description":
+                    entry.update(category=t['category'], amount=t['amount'], type=t['type'])
+    return entries
+
+async def record_search_terms(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    entries = search_term_entries(added, 1, search_term_entries(removed, -1))
+    operations = []
+    for (field, key), entry in entries.items():
+        update = {}
+        if entry['count']:
+            update["$inc"] = {"count": entry['count']}
+        prefill = {k: entry[k] for k in ("term", "category", "amount", "type") if k in entry}
+        if 'last_used' in entry:
+            update["$max"] = {"last_used": entry['last_used']}
+            update["$setOnInsert"] = prefill
+        if update:
+            operations.append(UpdateOne({"user_id": user_id, "key": key, "field": field}, update, upsert='last_used' in entry))
+        if 'last_used' in entry:
+            # an older transaction must not overwrite the prefill of a more recent one
+            operations.append(UpdateOne(
+                {"user_id": user_id, "key": key, "field": field, "last_used": {"$lte": entry['last_used']}},
+                {"$set": prefill}
+            ))
+    if operations:
+        # ordered, so each conditional $set runs after the $max of its own term
+        await db.search_terms.bulk_write(operations)
+    if removed:
+        await db.search_terms.delete_many({"user_id": user_id, "count": {"$lte": 0}})
+        await refresh_removed_search_terms(user_id, removed)
+
+async def refresh_search_term(user_id: str, field: str, key: str, term: str):
+    latest = await db.transactions.find(
+        {"user_id": user_id, field: term}, CHANGE_FIELDS, collation=SEARCH_TERM_COLLATION
+    ).sort("date", DESCENDING).limit(1).to_list(None)
+    entry = search_term_entries(latest, 1).get((field, key))
+    if entry:
+        await db.search_terms.update_one(
+            {"user_id": user_id, "key": key, "field": field},
+            {"$set": {k: entry[k] for k in ("term", "last_used", "category", "amount", "type") if k in entry}}
+        )
+
+async def refresh_removed_search_terms(user_id: str, removed: List[dict]):
+    # when the most recent use of a term goes away, term/category/amount must come from the next most recent one
+    removed_latest = {}
+    for t in removed:
+        for field in SEARCH_TERM_FIELDS:
+            _, key = search_term(t, field)
+            if key and t['date'] >= removed_latest.get((field, key), t['date']):
+                removed_latest[(field, key)] = t['date']
+    if not removed_latest:
+        return
+    stored = await db.search_terms.find(
+        {"user_id": user_id, "$or": [{"field": field, "key": key} for field, key in removed_latest]},
+        {"_id": 0, "field": 1, "key": 1, "term": 1, "last_used": 1}
+    ).to_list(None)
+    await asyncio.gather(*(
+        refresh_search_term(user_id, doc['field'], doc['key'], doc['term'])
+        for doc in stored
+        if removed_latest[(doc['field'], doc['key'])] >= doc['last_used']
+    ))
+
+async def replace_derived(collection, query: dict, docs: List[dict], key_fields: tuple):
+    # upserts each document in place and then drops only the stale ones, so readers never see the
+    # collection emptied and a concurrent $inc upsert can't collide with a fresh insert
+    for start in range(0, len(docs), IMPORT_BATCH_SIZE):
+        await collection.bulk_write([
+            ReplaceOne({field: doc[field] for field in key_fields}, doc, upsert=True)
+            for doc in docs[start:start + IMPORT_BATCH_SIZE]
+        ], ordered=False)
+    current = {tuple(doc[field] for field in key_fields) for doc in docs}
+    stale = [
+        doc['_id']
+        async for doc in collection.find(query, {field: 1 for field in key_fields})
+        if tuple(doc.get(field) for field in key_fields) not in current
+    ]
+    for start in range(0, len(stale), IMPORT_BATCH_SIZE):
+        await collection.delete_many({"_id": {"$in": stale[start:start + IMPORT_BATCH_SIZE]}})
+
+async def rebuild_search_terms(user_id: Optional[str] = None) -> int:
+    query = {"user_id": user_id} if user_id else {}
+    terms = {}
+    async for t in db.transactions.find(query, {**CHANGE_FIELDS, "user_id": 1}):
+        search_term_entries([t], 1, terms.setdefault(t['user_id'], {}))
+    docs = [
+        {"user_id": term_user_id, "field": field, "key": key, **entry}
+        for term_user_id, entries in terms.items()
+        for (field, key), entry in entries.items()
+    ]
+    await replace_derived(db.search_terms, query, docs, ("user_id", "key", "field"))
+    logger.info(f"Termos de busca reconstruídos: {len(docs)} documentos")
+    return len(docs)
+
+def budget_bucket(period: str, date: datetime) -> str:
+    return rollup_month(date) if period == "month" else date.strftime("%Y")
+
+def budget_counter_increments(transactions: List[dict], sign: int, increments: Optional[dict] = None) -> dict:
+    increments = {} if increments is None else increments
+    for t in transactions:
+        if t['type'] != "saida":
+            continue
+        for period in ("month", "year"):
+            counter = increments.setdefault((period, budget_bucket(period, t['date']), t['category']), {})
+            add_increment(counter, "spent", sign * t['amount'])
+            add_increment(counter, "count", sign)
+    return increments
+
+async def record_budget_counters(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    increments = budget_counter_increments(added, 1, budget_counter_increments(removed, -1))
+    operations = [
+        UpdateOne({"user_id": user_id, "period": period, "bucket": bucket, "category": category}, {"$inc": counter}, upsert=True)
+        for (period, bucket, category), counter in increments.items()
+        if counter['spent'] or counter['count']
+    ]
+    if operations:
+        await db.budget_counters.bulk_write(operations, ordered=False)
+
+async def rebuild_budget_counters(user_id: Optional[str] = None) -> int:
+    match = {"type": "saida"}
+    if user_id:
+        match["user_id"] = user_id
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}},
+                "category": "$category"
+            },
+            "spent": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    counters = {}
+    async for row in db.transactions.aggregate(pipeline):
+        key = row['_id']
+        for period, bucket in (("month", key['month']), ("year", key['month'][:4])):
+            counter = counters.setdefault((key['user_id'], period, bucket, key['category']), {})
+            add_increment(counter, "spent", row['spent'])
+            add_increment(counter, "count", row['count'])
+    docs = [
+        {"user_id": counter_user_id, "period": period, "bucket": bucket, "category": category, **counter}
+        for (counter_user_id, period, bucket, category), counter in counters.items()
+    ]
+    await replace_derived(db.budget_counters, {"user_id": user_id} if user_id else {}, docs, ("user_id", "period", "bucket", "category"))
+    logger.info(f"Contadores de orçamento reconstruídos: {len(docs)} documentos")
+    return len(docs)
+
+async def record_transaction_log(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    upserted = list(dict.fromkeys(t['id'] for t in added))
+    deleted = [transaction_id for transaction_id in dict.fromkeys(t['id'] for t in removed) if transaction_id not in set(upserted)]
+    await record_changes(user_id, "transactions", upserted, deleted)
+
+async def record_transaction_changes(user_id: str, added: List[dict] = (), removed: List[dict] = ()):
+    if not added and not removed:
+        return
+    await asyncio.gather(
+        record_rollup(user_id, added, removed),
+        record_search_terms(user_id, added, removed),
+        record_budget_counters(user_id, added, removed),
+        record_transaction_log(user_id, added, removed)
+    )
+
+async def get_rollups(user_id: str, start_date: datetime, end_date: Optional[datetime] = None) -> List[dict]:
+    month_range = {"$gte": rollup_month(start_date)}
+    if end_date is not None:
+        month_range["$lt"] = rollup_month(end_date)
+    return await db.monthly_rollups.find({"user_id": user_id, "month": month_range}, {"_id": 0}).to_list(None)
+
+def is_month_start(date: Optional[datetime]) -> bool:
+    return date is None or (date.day == 1 and date.hour == 0 and date.minute == 0 and date.second == 0 and date.microsecond == 0)
+
+async def compute_rollups(user_id: Optional[str] = None) -> dict:
+    pipeline = [
+        {"$match": {"user_id": user_id} if user_id else {}},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "month": {"$dateToString": {"format": "%Y-%m", "date": "$date"}},
+                "type": "$type",
+                "category": "$category"
+            },
+            "total": {"$sum": "$amount"},
+            "count": {"$sum": 1}
+        }}
+    ]
+    rollups = {}
+    async for row in db.transactions.aggregate(pipeline):
+        key = row['_id']
+        doc = rollups.setdefault((key['user_id'], key['month']), {
+            "user_id": key['user_id'],
+            "month": key['month'],
+            "income": 0.0,
+            "income_count": 0,
+            "expense": 0.0,
+            "expense_count": 0,
+            "categories": {}
+        })
+        field = "income" if key['type'] == "entrada" else "expense"
+        doc[field] += row['total']
+        doc[f"{field}_count"] += row['count']
+        if key['type'] == "saida":
+            category = doc['categories'].setdefault(rollup_category_key(key['category']), {"total": 0.0, "count": 0})
+            category['total'] += row['total']
+            category['count'] += row['count']
+    return rollups
+
+async def rebuild_rollups(user_id: Optional[str] = None) -> int:
+    rollups = list((await compute_rollups(user_id)).values())
+    await replace_derived(db.monthly_rollups, {"user_id": user_id} if user_id else {}, rollups, ("user_id", "month"))
+    logger.info(f"Resumos mensais reconstruídos: {len(rollups)} documentos")
+    return len(rollups)
+
+def rollups_match(expected: Optional[dict], stored: Optional[dict]) -> bool:
+    expected = expected or {}
+    stored = stored or {}
+    for field in ("income", "expense"):
+        if not math.isclose(expected.get(field, 0), stored.get(field, 0), abs_tol=0.005):
+            return False
+        if expected.get(f"{field}_count", 0) != stored.get(f"{field}_count", 0):
+            return False
+    expected_categories = {k: v for k, v in expected.get('categories', {}).items() if v.get('count')}
+    stored_categories = {k: v for k, v in stored.get('categories', {}).items() if v.get('count')}
+    if expected_categories.keys() != stored_categories.keys():
+        return False
+    return all(
+        expected_categories[k]['count'] == stored_categories[k]['count']
+        and math.isclose(expected_categories[k]['total'], stored_categories[k]['total'], abs_tol=0.005)
+        for k in expected_categories
+    )
+
+async def verify_rollups(user_id: Optional[str] = None) -> List[str]:
+    expected = await compute_rollups(user_id)
+    stored = {}
+    async for doc in db.monthly_rollups.find({"user_id": user_id} if user_id else {}, {"_id": 0}):
+        stored[(doc['user_id'], doc['month'])] = doc
+    mismatches = [f"{key[0]} {key[1]}" for key in sorted(expected.keys() | stored.keys()) if not rollups_match(expected.get(key), stored.get(key))]
+    if mismatches:
+        logger.warning(f"Resumos mensais divergentes: {len(mismatches)}")
+    return mismatches
 
 @api_router.post("/transactions", response_model=Transaction)
 async def create_transaction(input: TransactionCreate, user_id: str = Depends(get_current_user)):
@@ -261,12 +1031,14 @@ async def create_transaction(input: TransactionCreate, user_id: str = Depends(ge
             frequency=input.recurring_frequency,
             weekdays=input.recurring_weekdays,
             day_of_month=input.recurring_day_of_month,
-            start_date=input.date,
-            end_date=input.recurring_end_date
+            start_date=input.date.isoformat(),
+            end_date=input.recurring_end_date,
+            has_reminder=input.has_reminder,
+            materialized_until=input.date
         )
         recurring_doc = recurring_obj.model_dump()
-        recurring_doc['created_at'] = recurring_doc['created_at'].isoformat()
         await db.recurring_transactions.insert_one(recurring_doc)
+        await record_changes(user_id, "recurring", upserted=[recurring_obj.id])
         
         transaction_obj = Transaction(
             user_id=user_id,
@@ -290,140 +1062,635 @@ async def create_transaction(input: TransactionCreate, user_id: str = Depends(ge
         )
     
     doc = transaction_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.transactions.insert_one(doc)
+    await record_transaction_changes(user_id, added=[doc])
+    if input.is_recurring:
+        await materialize_recurring_rule(recurring_doc, recurring_horizon())
     return transaction_obj
 
+def encode_cursor(transaction: dict) -> str:
+    payload = {"d": transaction['date'].isoformat(), "o": transaction.get('order_index', 0), "i": transaction['id']}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def cursor_query(token: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        date = ensure_utc(datetime.fromisoformat(payload['d']))
+        order_index = int(payload['o'])
+        transaction_id = str(payload['i'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {"$or": [
+        {"date": {"$lt": date}},
+        {"date": date, "order_index": {"$gt": order_index}},
+        {"date": date, "order_index": order_index, "id": {"$gt": transaction_id}}
+    ]}
+
+TRANSACTIONS_PAGE_SIZE = 100
+TRANSACTIONS_MAX_PAGE_SIZE = 500
+
+async def fetch_transaction_page(query: dict, limit: int, cursor: Optional[str] = None) -> tuple:
+    if cursor:
+        query = {"$and": [query, cursor_query(cursor)]}
+    transactions = await db.transactions.find(query, TRANSACTION_PROJECTION).sort(TRANSACTION_SORT).limit(limit + 1).to_list(None)
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        return transactions, encode_cursor(transactions[-1])
+    return transactions, None
+
+async def paginate_transactions(query: dict, limit: int, cursor: Optional[str] = None, headers: Optional[dict] = None) -> ORJSONResponse:
+    transactions, next_cursor = await fetch_transaction_page(query, limit, cursor)
+    headers = dict(headers or {})
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse(transactions, headers=headers)
+
+def transaction_filters(
+    type: Optional[str] = None,
+    category: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> dict:
+    query = {}
+    if type:
+        query["type"] = type
+    if category:
+        query["category"] = category
+    amount_range = {}
+    if min_amount is not None:
+        amount_range["$gte"] = min_amount
+    if max_amount is not None:
+        amount_range["$lte"] = max_amount
+    if amount_range:
+        query["amount"] = amount_range
+    date_range = {}
+    if start_date is not None:
+        date_range["$gte"] = start_date
+    if end_date is not None:
+        date_range["$lt"] = end_date
+    if date_range:
+        query["date"] = date_range
+    return query
+
 @api_router.get("/transactions", response_model=List[Transaction])
-async def get_transactions(user_id: str = Depends(get_current_user)):
-    transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    for t in transactions:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
+async def get_transactions(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(data_version_etag),
+    type: Optional[Literal["entrada", "saida"]] = None,
+    category: Optional[str] = None,
+    start_date: Optional[UtcDatetime] = None,
+    end_date: Optional[UtcDatetime] = None,
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    query = {"user_id": user_id, **transaction_filters(type, category, start_date=start_date, end_date=end_date)}
+    return await paginate_transactions(query, limit, cursor, etag_headers(etag))
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_MAX_ERRORS = 1000
+IMPORT_COLUMNS = {
+    "data": "date",
+    "date": "date",
+    "tipo": "type",
+    "type": "type",
+    "categoria": "category",
+    "category": "category",
+    "descrição": "description",
+    "descricao": "description",
+    "description": "description",
+    "valor": "amount",
+    "amount": "amount",
+}
+IMPORT_TYPES = {"entrada": "entrada", "saída": "saida", "saida": "saida"}
+OFX_TRANSACTION_RE = re.compile(r"<STMTTRN>(.*?)</STMTTRN>", re.IGNORECASE | re.DOTALL)
+OFX_FIELD_RE = re.compile(r"<(\w+)>([^<\r\n]*)")
+
+def parse_import_amount(value: str) -> float:
+    cleaned = value.replace("R$", "").replace(" ", "").strip()
+    if "," in cleaned:
+        cleaned = cleaned.replace(".", "").replace(",", ".")
+    try:
+        return float(cleaned)
+    except ValueError:
+        raise ValueError(f"Valor inválido: {value}")
+
+def parse_import_date(value: str) -> datetime:
+    value = value.strip()
+    for date_format in ("%d/%m/%Y", "%Y%m%d"):
+        try:
+            return datetime.strptime(value, date_format).replace(tzinfo=timezone.utc)
+        except ValueError:
+            pass
+    try:
+        return ensure_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise ValueError(f"Data inválida: {value}")
+
+def latin1_fallback(error: UnicodeDecodeError):
+    # bank exports are often latin-1/cp1252; decode the offending bytes as latin-1, like iter_ofx_rows
+    return error.object[error.start:error.end].decode("latin-1"), error.end
+
+codecs.register_error("import_latin1", latin1_fallback)
+
+def iter_csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", errors="import_latin1", newline="")
+    header = text.readline()
+    delimiter = ";" if header.count(";") > header.count(",") else ","
+    try:
+        fieldnames = [IMPORT_COLUMNS.get(name.strip().lower(), name.strip().lower()) for name in next(csv.reader([header], delimiter=delimiter), [])]
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Cabeçalho CSV inválido: {e}")
+    reader = csv.DictReader(text, fieldnames=fieldnames, delimiter=delimiter)
+    row_number = 1
+    while True:
+        row_number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            row = {"_error": f"Linha CSV inválida: {e}"}
+        yield row_number, row
+
+def iter_ofx_rows(content: bytes):
+    try:
+        text = content.decode("utf-8")
+    except UnicodeDecodeError:
+        text = content.decode("latin-1")
+    for row_number, match in enumerate(OFX_TRANSACTION_RE.finditer(text), start=1):
+        fields = {name.upper(): value.strip() for name, value in OFX_FIELD_RE.findall(match.group(1))}
+        yield row_number, {
+            "date": fields.get("DTPOSTED", "")[:8],
+            "amount": fields.get("TRNAMT", ""),
+            "description": fields.get("MEMO") or fields.get("NAME", ""),
+            "fitid": fields.get("FITID"),
+        }
+
+def parse_import_row(row: dict) -> TransactionCreate:
+    if row.get("_error"):
+        raise ValueError(row["_error"])
+    if not row.get("date") or not row.get("amount"):
+        raise ValueError("Data e valor são obrigatórios")
+    amount = parse_import_amount(row["amount"])
+    transaction_type = IMPORT_TYPES.get((row.get("type") or "").strip().lower())
+    if transaction_type is None:
+        transaction_type = "saida" if amount < 0 else "entrada"
+    return TransactionCreate(
+        amount=abs(amount),
+        date=parse_import_date(row["date"]),
+        type=transaction_type,
+        category=(row.get("category") or "").strip() or "Outros",
+        description=(row.get("description") or "").strip()
+    )
+
+def import_key(data: TransactionCreate, fitid: Optional[str] = None) -> str:
+    return fitid or f"{data.date.isoformat()}|{data.amount:.2f}|{data.type}|{data.category}|{data.description}"
+
+def import_hash(user_id: str, key: str, occurrence: int = 1) -> str:
+    # identical rows repeated in one statement are separate transactions; the first keeps the bare key
+    if occurrence > 1:
+        key = f"{key}|#{occurrence}"
+    return hashlib.sha256(f"{user_id}|{key}".encode('utf-8')).hexdigest()
+
+async def insert_transaction_batch(user_id: str, docs: List[dict]):
+    try:
+        await db.transactions.insert_many(docs, ordered=False)
+        inserted, duplicates = docs, 0
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        duplicates = sum(1 for error in write_errors if error.get('code') == 11000)
+        if duplicates != len(write_errors):
+            raise
+        failed_indexes = {error['index'] for error in write_errors}
+        inserted = [doc for index, doc in enumerate(docs) if index not in failed_indexes]
+    await record_transaction_changes(user_id, added=inserted)
+    return len(inserted), duplicates
+
+@api_router.post("/transactions/import", response_model=ImportResult)
+async def import_transactions(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ofx"]] = None,
+    user_id: str = Depends(get_current_user)
+):
+    started = time.perf_counter()
+    if format is None:
+        format = "ofx" if (file.filename or "").lower().endswith((".ofx", ".qfx")) else "csv"
+    rows = iter_ofx_rows(await file.read()) if format == "ofx" else iter_csv_rows(file.file)
+    
+    total_rows = imported = duplicates = failed = 0
+    errors = []
+    batch = []
+    occurrences = {}
+    
+    for row_number, row in rows:
+        total_rows += 1
+        try:
+            data = parse_import_row(row)
+        except ValueError as e:
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                message = e.errors()[0]['msg'] if isinstance(e, ValidationError) else str(e)
+                errors.append(ImportRowError(row=row_number, error=message))
+            continue
+        
+        transaction_obj = Transaction(user_id=user_id, **data.model_dump(include={"amount", "date", "type", "category", "description"}))
+        doc = transaction_obj.model_dump()
+        key = import_key(data, row.get("fitid"))
+        occurrences[key] = occurrences.get(key, 0) + 1
+        doc['import_hash'] = import_hash(user_id, key, occurrences[key])
+        batch.append(doc)
+        
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            inserted, skipped = await insert_transaction_batch(user_id, batch)
+            imported += inserted
+            duplicates += skipped
+            batch = []
+    
+    if batch:
+        inserted, skipped = await insert_transaction_batch(user_id, batch)
+        imported += inserted
+        duplicates += skipped
     
-    transactions.sort(key=lambda x: datetime.fromisoformat(x['date']), reverse=True)
-    return transactions
+    elapsed = time.perf_counter() - started
+    logger.info(f"Importação de {total_rows} linhas ({format}) concluída em {elapsed:.2f}s")
+    return ImportResult(
+        total_rows=total_rows,
+        imported=imported,
+        duplicates=duplicates,
+        failed=failed,
+        errors=errors,
+        elapsed_seconds=elapsed,
+        rows_per_second=(total_rows / elapsed) if elapsed > 0 else 0
+    )
 
 @api_router.get("/transactions/{transaction_id}", response_model=Transaction)
 async def get_transaction(transaction_id: str, user_id: str = Depends(get_current_user)):
     transaction = await db.transactions.find_one({"id": transaction_id, "user_id": user_id}, {"_id": 0})
     if not transaction:
         raise HTTPException(status_code=404, detail="Transação não encontrada")
-    if isinstance(transaction['created_at'], str):
-        transaction['created_at'] = datetime.fromisoformat(transaction['created_at'])
     return transaction
 
 @api_router.put("/transactions/{transaction_id}", response_model=Transaction)
 async def update_transaction(transaction_id: str, input: TransactionUpdate, user_id: str = Depends(get_current_user)):
-    existing = await db.transactions.find_one({"id": transaction_id, "user_id": user_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Transação não encontrada")
-    
     update_data = {k: v for k, v in input.model_dump().items() if v is not None}
-    if update_data:
-        await db.transactions.update_one({"id": transaction_id}, {"$set": update_data})
+    query = {"id": transaction_id, "user_id": user_id}
+    if not update_data:
+        existing = await db.transactions.find_one(query, {"_id": 0})
+        if not existing:
+            raise HTTPException(status_code=404, detail="Transação não encontrada")
+        return existing
     
-    updated = await db.transactions.find_one({"id": transaction_id}, {"_id": 0})
-    if isinstance(updated['created_at'], str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
+    try:
+        existing = await db.transactions.find_one_and_update(
+            query, {"$set": update_data}, {"_id": 0}, return_document=ReturnDocument.BEFORE
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="Já existe uma ocorrência desta recorrência nesta data")
+    if not existing:
+        raise HTTPException(status_code=404, detail="Transação não encontrada")
+    updated = {**existing, **update_data}
+    await record_transaction_changes(user_id, added=[updated], removed=[existing])
     return updated
 
 @api_router.delete("/transactions/{transaction_id}")
 async def delete_transaction(transaction_id: str, user_id: str = Depends(get_current_user)):
-    result = await db.transactions.delete_one({"id": transaction_id, "user_id": user_id})
-    if result.deleted_count == 0:
+    deleted = await db.transactions.find_one_and_delete({"id": transaction_id, "user_id": user_id}, CHANGE_FIELDS)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Transação não encontrada")
+    await record_transaction_changes(user_id, removed=[deleted])
     return {"message": "Transação deletada com sucesso"}
 
-async def get_period_transactions(user_id: str, start_date: datetime):
-    transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    period_transactions = []
+BATCH_WRITE_CONCURRENCY = 16
+
+def transaction_guard(user_id: str, t: dict) -> dict:
+    # matches only while the document still holds the pre-image that was read
+    return {"user_id": user_id, **{field: t.get(field) for field in CHANGE_FIELDS if field != "_id"}}
+
+async def find_owned_transactions(user_id: str, transaction_ids: List[str]) -> dict:
+    existing = await db.transactions.find(
+        {"user_id": user_id, "id": {"$in": list(dict.fromkeys(transaction_ids))}},
+        CHANGE_FIELDS
+    ).to_list(None)
+    return {t['id']: t for t in existing}
+
+async def apply_to_owned_transactions(user_id: str, transaction_ids: List[str], operation) -> dict:
+    # one atomic find_one_and_* per id, so each pre-image is exactly the document this request changed
+    semaphore = asyncio.Semaphore(BATCH_WRITE_CONCURRENCY)
     
-    for t in transactions:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-        trans_date = datetime.fromisoformat(t['date']).replace(tzinfo=timezone.utc)
-        if trans_date >= start_date:
-            period_transactions.append(Transaction(**t))
+    async def apply(transaction_id: str) -> Optional[dict]:
+        async with semaphore:
+            return await operation({"id": transaction_id, "user_id": user_id})
     
-    period_transactions.sort(key=lambda x: datetime.fromisoformat(x.date), reverse=True)
-    return period_transactions
+    previous = await asyncio.gather(*(apply(transaction_id) for transaction_id in dict.fromkeys(transaction_ids)))
+    return {t['id']: t for t in previous if t}
 
-@api_router.get("/stats/week", response_model=PeriodStats)
-async def get_week_stats(user_id: str = Depends(get_current_user)):
-    now = datetime.now(timezone.utc)
-    week_start = now - timedelta(days=now.weekday())
-    week_start = week_start.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    transactions = await get_period_transactions(user_id, week_start)
-    total_income = sum(t.amount for t in transactions if t.type == "entrada")
-    total_expense = sum(t.amount for t in transactions if t.type == "saida")
-    
-    return PeriodStats(
-        total_income=total_income,
-        total_expense=total_expense,
-        balance=total_income - total_expense,
-        transactions=transactions
-    )
+REBUILD_MAX_ATTEMPTS = 3
 
-@api_router.get("/stats/month", response_model=PeriodStats)
-async def get_month_stats(user_id: str = Depends(get_current_user)):
-    now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    transactions = await get_period_transactions(user_id, month_start)
-    total_income = sum(t.amount for t in transactions if t.type == "entrada")
-    total_expense = sum(t.amount for t in transactions if t.type == "saida")
+async def rebuild_user_aggregates(user_id: str):
+    # a write landing between a rebuild's read and its replace would be lost or counted twice;
+    # every write bumps data_version, so repeat the pass until one runs without any
+    for _ in range(REBUILD_MAX_ATTEMPTS):
+        version = await get_data_version(user_id)
+        await asyncio.gather(rebuild_rollups(user_id), rebuild_search_terms(user_id), rebuild_budget_counters(user_id))
+        if await get_data_version(user_id) == version:
+            return
+    logger.warning(f"Agregados do usuário {user_id} reconstruídos sob escrita concorrente; rode verify-rollups")
+
+async def settle_batch_write(user_id: str, found: dict, expected: dict, written: int, retry) -> tuple:
+    # some rows changed between the read and the guarded write; the ones not in their
+    # expected post-write state (or still present, for deletes) are retried one by one
+    current = await find_owned_transactions(user_id, list(found))
+    pending = [transaction_id for transaction_id, t in current.items() if t != expected.get(transaction_id)]
+    applied = {transaction_id: t for transaction_id, t in found.items() if transaction_id not in pending}
+    if expected:
+        applied = {transaction_id: t for transaction_id, t in applied.items() if transaction_id in current}
+    # if the rows in their post-write state don't add up to what this write touched, a concurrent
+    # request overlapped them and the pre-images can't tell whose change is whose
+    consistent = len(applied) == written
+    retried = await apply_to_owned_transactions(user_id, pending, retry)
+    return {**applied, **retried}, consistent
+
+async def record_batch_changes(user_id: str, consistent: bool, added: List[dict] = (), removed: List[dict] = ()):
+    if consistent:
+        await record_transaction_changes(user_id, added, removed)
+        return
+    await record_transaction_log(user_id, added, removed)
+    await rebuild_user_aggregates(user_id)
+
+def batch_results(transaction_ids: List[str], found: set, status: str, conflicts: set = frozenset()) -> List[BatchItemResult]:
+    return [
+        BatchItemResult(
+            id=transaction_id,
+            status=status if transaction_id in found else "conflict" if transaction_id in conflicts else "not_found"
+        )
+        for transaction_id in dict.fromkeys(transaction_ids)
+    ]
+
+@api_router.post("/transactions/batch-delete", response_model=BatchResult)
+async def batch_delete_transactions(request: BatchDeleteRequest, user_id: str = Depends(get_current_user)):
+    found = await find_owned_transactions(user_id, request.transaction_ids)
+    consistent = True
+    if found:
+        result = await db.transactions.bulk_write(
+            [DeleteOne(transaction_guard(user_id, t)) for t in found.values()], ordered=False
+        )
+        if result.deleted_count < len(found):
+            found, consistent = await settle_batch_write(
+                user_id, found, {}, result.deleted_count,
+                lambda query: db.transactions.find_one_and_delete(query, CHANGE_FIELDS)
+            )
+    await record_batch_changes(user_id, consistent, removed=list(found.values()))
+    return BatchResult(processed=len(found), results=batch_results(request.transaction_ids, found, "deleted"))
+
+@api_router.post("/transactions/batch-update", response_model=BatchResult)
+async def batch_update_transactions(request: BatchUpdateRequest, user_id: str = Depends(get_current_user)):
+    update_data = {k: v for k, v in request.update.model_dump().items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="Nenhum campo para atualizar")
     
-    return PeriodStats(
-        total_income=total_income,
-        total_expense=total_expense,
-        balance=total_income - total_expense,
-        transactions=transactions
+    found = await find_owned_transactions(user_id, request.transaction_ids)
+    conflicts = set()
+    consistent = True
+    if found:
+        operations = [UpdateOne(transaction_guard(user_id, t), {"$set": update_data}) for t in found.values()]
+        try:
+            matched = (await db.transactions.bulk_write(operations, ordered=False)).matched_count
+        except BulkWriteError as e:
+            if any(error['code'] != 11000 for error in e.details['writeErrors']):
+                raise
+            # moving recurring occurrences onto dates their rule already has
+            ids = list(found)
+            conflicts = {ids[error['index']] for error in e.details['writeErrors']}
+            found = {transaction_id: t for transaction_id, t in found.items() if transaction_id not in conflicts}
+            matched = e.details['nMatched']
+        
+        if matched < len(found):
+            async def retry(query: dict) -> Optional[dict]:
+                try:
+                    return await db.transactions.find_one_and_update(
+                        query, {"$set": update_data}, CHANGE_FIELDS, return_document=ReturnDocument.BEFORE
+                    )
+                except DuplicateKeyError:
+                    conflicts.add(query['id'])
+                    return None
+            
+            changed = {k: v for k, v in update_data.items() if k in CHANGE_FIELDS}
+            expected = {transaction_id: {**t, **changed} for transaction_id, t in found.items()}
+            found, consistent = await settle_batch_write(user_id, found, expected, matched, retry)
+    await record_batch_changes(
+        user_id,
+        consistent,
+        added=[{**t, **update_data} for t in found.values()],
+        removed=list(found.values())
     )
+    return BatchResult(processed=len(found), results=batch_results(request.transaction_ids, found, "updated", conflicts))
 
-@api_router.get("/stats/year", response_model=PeriodStats)
-async def get_year_stats(user_id: str = Depends(get_current_user)):
-    now = datetime.now(timezone.utc)
-    year_start = now.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+def period_query(user_id: str, start_date: datetime, end_date: Optional[datetime] = None) -> dict:
+    date_range = {"$gte": start_date}
+    if end_date is not None:
+        date_range["$lt"] = end_date
+    return {"user_id": user_id, "date": date_range}
+
+async def get_period_transactions(user_id: str, start_date: datetime, end_date: Optional[datetime] = None, limit: Optional[int] = None):
+    cursor = db.transactions.find(period_query(user_id, start_date, end_date), TRANSACTION_PROJECTION).sort("date", -1)
+    if limit:
+        cursor = cursor.limit(limit)
+    return await cursor.to_list(None)
+
+def rollup_split(start_date: datetime, end_date: Optional[datetime]) -> Optional[datetime]:
+    if end_date is None or not is_month_start(start_date) or is_month_start(end_date):
+        return None
+    month_start = period_start("month", end_date)
+    return month_start if month_start > start_date else None
+
+async def get_period_totals(user_id: str, start_date: datetime, end_date: Optional[datetime] = None) -> dict:
+    if is_month_start(start_date) and is_month_start(end_date):
+        rollups = await get_rollups(user_id, start_date, end_date)
+        return {
+            "entrada": sum(rollup.get('income', 0) for rollup in rollups),
+            "saida": sum(rollup.get('expense', 0) for rollup in rollups)
+        }
+    split = rollup_split(start_date, end_date)
+    if split:
+        full_months, partial_month = await asyncio.gather(
+            get_period_totals(user_id, start_date, split),
+            get_period_totals(user_id, split, end_date)
+        )
+        return {field: full_months[field] + partial_month[field] for field in ("entrada", "saida")}
     
-    transactions = await get_period_transactions(user_id, year_start)
-    total_income = sum(t.amount for t in transactions if t.type == "entrada")
-    total_expense = sum(t.amount for t in transactions if t.type == "saida")
+    pipeline = [
+        {"$match": period_query(user_id, start_date, end_date)},
+        {"$group": {"_id": "$type", "total": {"$sum": "$amount"}}}
+    ]
+    totals = {"entrada": 0.0, "saida": 0.0}
+    async for row in db.transactions.aggregate(pipeline):
+        totals[row['_id']] = row['total']
+    return totals
+
+async def get_category_expenses(user_id: str, start_date: datetime, end_date: Optional[datetime] = None) -> dict:
+    if is_month_start(start_date) and is_month_start(end_date):
+        totals = {}
+        counts = {}
+        for rollup in await get_rollups(user_id, start_date, end_date):
+            for key, values in rollup.get('categories', {}).items():
+                category = unquote(key)
+                totals[category] = totals.get(category, 0) + values.get('total', 0)
+                counts[category] = counts.get(category, 0) + values.get('count', 0)
+        return {category: total for category, total in totals.items() if counts[category] > 0}
+    split = rollup_split(start_date, end_date)
+    if split:
+        full_months, partial_month = await asyncio.gather(
+            get_category_expenses(user_id, start_date, split),
+            get_category_expenses(user_id, split, end_date)
+        )
+        for category, total in partial_month.items():
+            full_months[category] = full_months.get(category, 0) + total
+        return full_months
     
-    return PeriodStats(
-        total_income=total_income,
-        total_expense=total_expense,
-        balance=total_income - total_expense,
-        transactions=transactions
-    )
+    query = period_query(user_id, start_date, end_date)
+    query["type"] = "saida"
+    pipeline = [
+        {"$match": query},
+        {"$group": {"_id": "$category", "total": {"$sum": "$amount"}}}
+    ]
+    return {row['_id']: row['total'] async for row in db.transactions.aggregate(pipeline)}
 
-@api_router.post("/tips")
-async def generate_tips(request: TipsRequest, user_id: str = Depends(get_current_user)):
-    if request.period == "week":
-        stats = await get_week_stats(user_id)
-    elif request.period == "month":
-        stats = await get_month_stats(user_id)
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == "week":
+        return day_start - timedelta(days=now.weekday())
+    if period == "day":
+        return day_start
+    if period == "month":
+        return day_start.replace(day=1)
+    return day_start.replace(month=1, day=1)
+
+def period_end(period: str, now: Optional[datetime] = None) -> datetime:
+    start = period_start(period, now)
+    if period == "week":
+        return start + timedelta(days=7)
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "month":
+        return add_months(start, 1, 1)
+    return start.replace(year=start.year + 1)
+
+def period_stats(income: float, expense: float, transactions: Optional[List[dict]] = None, scheduled: Optional[List[dict]] = None) -> dict:
+    return {
+        "total_income": income,
+        "total_expense": expense,
+        "balance": income - expense,
+        "transactions": transactions or [],
+        "scheduled": scheduled or []
+    }
+
+async def build_period_stats(user_id: str, period: str, include_transactions: bool = True, limit: Optional[int] = None) -> dict:
+    now = datetime.now(timezone.utc)
+    start_date = period_start(period, now)
+    if include_transactions:
+        # what is still due later in the period comes back separately, soonest first, for the upcoming panel
+        totals, transactions, scheduled = await asyncio.gather(
+            get_period_totals(user_id, start_date, now),
+            get_period_transactions(user_id, start_date, now, limit=limit),
+            get_scheduled_transactions(user_id, now, period_end(period, now))
+        )
     else:
-        stats = await get_year_stats(user_id)
+        totals, transactions, scheduled = await get_period_totals(user_id, start_date, now), [], []
     
-    categories_expense = {}
-    for t in stats.transactions:
-        if t.type == "saida":
-            if t.category not in categories_expense:
-                categories_expense[t.category] = 0
-            categories_expense[t.category] += t.amount
+    return period_stats(totals["entrada"], totals["saida"], transactions, scheduled)
+
+@api_router.get("/stats/week", response_model=PeriodStats)
+async def get_week_stats(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(hourly_data_version_etag),
+    include_transactions: bool = True,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    stats = await build_period_stats(user_id, "week", include_transactions, limit)
+    return ORJSONResponse(stats, headers=etag_headers(etag))
+
+@api_router.get("/stats/month", response_model=PeriodStats)
+async def get_month_stats(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(hourly_data_version_etag),
+    include_transactions: bool = True,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    stats = await build_period_stats(user_id, "month", include_transactions, limit)
+    return ORJSONResponse(stats, headers=etag_headers(etag))
+
+@api_router.get("/stats/year", response_model=PeriodStats)
+async def get_year_stats(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(hourly_data_version_etag),
+    include_transactions: bool = True,
+    limit: Optional[int] = Query(None, ge=1)
+):
+    stats = await build_period_stats(user_id, "year", include_transactions, limit)
+    return ORJSONResponse(stats, headers=etag_headers(etag))
+
+class RateLimiter:
+    def __init__(self, rate_per_second: float):
+        self.interval = 1 / rate_per_second if rate_per_second > 0 else 0
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
     
-    prompt = f"""Você é um assistente financeiro. Analise os seguintes dados financeiros e gere 3 dicas práticas e personalizadas em português:
+    async def acquire(self):
+        async with self.lock:
+            now = time.monotonic()
+            wait = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
 
-Período: {request.period}
-Receitas totais: R$ {stats.total_income:.2f}
-Despesas totais: R$ {stats.total_expense:.2f}
-Saldo: R$ {stats.balance:.2f}
-Despesas por categoria: {categories_expense}
+class MemoryTipsCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.cache = LRUCache(max_entries, ttl_seconds)
+    
+    async def get(self, key: str) -> Optional[str]:
+        return self.cache.get(key)
+    
+    async def set(self, key: str, tips: str):
+        self.cache.set(key, tips)
 
-Gere 3 dicas curtas e objetivas (máximo 2 linhas cada) para ajudar a pessoa a gerenciar melhor suas finanças."""
+class MongoTipsCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
     
+    async def get(self, key: str) -> Optional[str]:
+        doc = await db.tips_cache.find_one({"key": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0, "tips": 1})
+        return doc['tips'] if doc else None
+    
+    async def set(self, key: str, tips: str):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)
+        await db.tips_cache.update_one({"key": key}, {"$set": {"tips": tips, "expires_at": expires_at}}, upsert=True)
+
+TIPS_CACHE_BACKENDS = {"memory": MemoryTipsCache, "mongo": MongoTipsCache}
+tips_cache = TIPS_CACHE_BACKENDS[TIPS_CACHE_BACKEND](TIPS_CACHE_MAX_ENTRIES, TIPS_CACHE_TTL_SECONDS)
+tips_in_flight = {}
+TIPS_FALLBACK = "Não foi possível gerar dicas no momento. Tente novamente mais tarde."
+
+def tips_cache_key(period: str, stats: PeriodStats, categories_expense: dict) -> str:
+    payload = {
+        "period": period,
+        "income": round(stats.total_income, 2),
+        "expense": round(stats.total_expense, 2),
+        "categories": {category: round(total, 2) for category, total in categories_expense.items()}
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+async def single_flight(key: str, factory):
+    task = tips_in_flight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(factory())
+        tips_in_flight[key] = task
+        task.add_done_callback(lambda _: tips_in_flight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def request_llm_tips(key: str, prompt: str) -> Optional[str]:
     try:
         chat = LlmChat(
             api_key=EMERGENT_KEY,
@@ -433,14 +1700,278 @@ Gere 3 dicas curtas e objetivas (máximo 2 linhas cada) para ajudar a pessoa a g
         
         user_message = UserMessage(text=prompt)
         response = await chat.send_message(user_message)
-        
-        return {"tips": response, "stats": stats.model_dump()}
     except Exception as e:
         logger.error(f"Erro ao gerar dicas: {str(e)}")
-        return {
-            "tips": "Não foi possível gerar dicas no momento. Tente novamente mais tarde.",
-            "stats": stats.model_dump()
+        return None
+    
+    await tips_cache.set(key, response)
+    return response
+
+async def get_cached_tips(period: str, stats: PeriodStats, categories_expense: dict) -> Optional[str]:
+    key = tips_cache_key(period, stats, categories_expense)
+    tips = await tips_cache.get(key)
+    if tips is not None:
+        return tips
+    prompt = build_tips_prompt(period, stats, categories_expense)
+    return await single_flight(key, lambda: request_llm_tips(key, prompt))
+
+def build_tips_prompt(period: str, stats: PeriodStats, categories_expense: dict) -> str:
+    return f"""Você é um assistente financeiro. Analise os seguintes dados financeiros e gere 3 dicas práticas e personalizadas em português:
+
+Período: {period}
+Receitas totais: R$ {stats.total_income:.2f}
+Despesas totais: R$ {stats.total_expense:.2f}
+Saldo: R$ {stats.balance:.2f}
+Despesas por categoria: {categories_expense}
+
+Gere 3 dicas curtas e objetivas (máximo 2 linhas cada) para ajudar a pessoa a gerenciar melhor suas finanças."""
+
+async def compute_tips_inputs(user_id: str, period: str):
+    now = datetime.now(timezone.utc)
+    start_date = period_start(period, now)
+    totals, categories_expense = await asyncio.gather(
+        get_period_totals(user_id, start_date, now),
+        get_category_expenses(user_id, start_date, now)
+    )
+    stats = PeriodStats(**period_stats(totals["entrada"], totals["saida"]))
+    return start_date, stats, dict(sorted(categories_expense.items()))
+
+def tips_snapshot(start_date: datetime, stats: PeriodStats, categories_expense: dict) -> dict:
+    return {
+        "period_start": start_date,
+        "income": stats.total_income,
+        "expense": stats.total_expense,
+        "categories": [[category, total] for category, total in categories_expense.items()]
+    }
+
+def tips_drift(snapshot: dict, current: dict) -> float:
+    if snapshot.get('period_start') != current['period_start']:
+        return math.inf
+    previous_values = {"income": snapshot['income'], "expense": snapshot['expense']}
+    previous_values.update({f"category:{c}": total for c, total in snapshot['categories']})
+    current_values = {"income": current['income'], "expense": current['expense']}
+    current_values.update({f"category:{c}": total for c, total in current['categories']})
+    return max(
+        abs(current_values.get(key, 0) - previous_values.get(key, 0)) / max(abs(previous_values.get(key, 0)), 1.0)
+        for key in previous_values.keys() | current_values.keys()
+    )
+
+async def store_precomputed_tips(user_id: str, period: str, tips: str, snapshot: dict):
+    await db.precomputed_tips.update_one(
+        {"user_id": user_id, "period": period},
+        {"$set": {"tips": tips, "snapshot": snapshot, "generated_at": datetime.now(timezone.utc)}},
+        upsert=True
+    )
+
+tips_llm_limiter = RateLimiter(TIPS_LLM_RATE_PER_SECOND)
+
+TIPS_PRECOMPUTE_LOCK_SECONDS = 12 * 3600
+
+async def precompute_tips(now: Optional[datetime] = None) -> int:
+    # every worker schedules the daily run; the lease makes TIPS_PRECOMPUTE_MAX_CALLS a global budget
+    if not await acquire_startup_lock("precompute_tips", TIPS_PRECOMPUTE_LOCK_SECONDS):
+        logger.info("Pré-cálculo de dicas já executado por outro worker")
+        return 0
+    active_since = (now or datetime.now(timezone.utc)) - timedelta(days=TIPS_ACTIVE_DAYS)
+    semaphore = asyncio.Semaphore(TIPS_PRECOMPUTE_CONCURRENCY)
+    budget = {"calls": TIPS_PRECOMPUTE_MAX_CALLS}
+    
+    async def precompute(user_id: str, period: str) -> bool:
+        async with semaphore:
+            start_date, stats, categories_expense = await compute_tips_inputs(user_id, period)
+            snapshot = tips_snapshot(start_date, stats, categories_expense)
+            stored = await db.precomputed_tips.find_one({"user_id": user_id, "period": period}, {"_id": 0, "snapshot": 1})
+            if stored and tips_drift(stored['snapshot'], snapshot) <= TIPS_DRIFT_THRESHOLD:
+                return False
+            # cache hits (same numbers as another user or an earlier run) cost no LLM call
+            tips = await tips_cache.get(tips_cache_key(period, stats, categories_expense))
+            if tips is None:
+                if budget["calls"] <= 0:
+                    return False
+                budget["calls"] -= 1
+                await tips_llm_limiter.acquire()
+                tips = await get_cached_tips(period, stats, categories_expense)
+            if tips is None:
+                return False
+            await store_precomputed_tips(user_id, period, tips, snapshot)
+            return True
+    
+    generated = 0
+    users = db.users.find({"last_active_at": {"$gte": active_since}}, {"_id": 0, "id": 1}).batch_size(TIPS_PRECOMPUTE_CONCURRENCY * 25)
+    batch = []
+    async for user in users:
+        batch.extend((user['id'], period) for period in ("week", "month", "year"))
+        if len(batch) >= TIPS_PRECOMPUTE_CONCURRENCY * 25:
+            generated += sum(await asyncio.gather(*(precompute(*item) for item in batch)))
+            batch = []
+    if batch:
+        generated += sum(await asyncio.gather(*(precompute(*item) for item in batch)))
+    
+    logger.info(f"Dicas pré-calculadas: {generated} geradas, orçamento restante {budget['calls']}")
+    return generated
+
+@api_router.post("/tips")
+async def generate_tips(request: TipsRequest, user_id: str = Depends(get_current_user)):
+    start_date, stats, categories_expense = await compute_tips_inputs(user_id, request.period)
+    snapshot = tips_snapshot(start_date, stats, categories_expense)
+    
+    await record_activity(user_id)
+    
+    stored = await db.precomputed_tips.find_one({"user_id": user_id, "period": request.period}, {"_id": 0})
+    if stored and tips_drift(stored['snapshot'], snapshot) <= TIPS_DRIFT_THRESHOLD:
+        return {"tips": stored['tips'], "stats": stats.model_dump()}
+    
+    tips = await get_cached_tips(request.period, stats, categories_expense)
+    if tips is not None:
+        await store_precomputed_tips(user_id, request.period, tips, snapshot)
+    return {"tips": tips or TIPS_FALLBACK, "stats": stats.model_dump()}
+
+class ResendTransport:
+    async def send(self, params: dict) -> dict:
+        return await asyncio.to_thread(resend.Emails.send, params)
+
+class LocalTransport:
+    def __init__(self):
+        self.outbox = []
+    
+    async def send(self, params: dict) -> dict:
+        self.outbox.append(params)
+        logger.info(f"E-mail local para {', '.join(params['to'])}: {params['subject']}")
+        return {"id": f"local-{uuid.uuid4()}"}
+
+REMINDER_TRANSPORTS = {"resend": ResendTransport, "local": LocalTransport}
+reminder_transport = REMINDER_TRANSPORTS[REMINDER_TRANSPORT]()
+
+class ReminderMetrics(BaseModel):
+    runs: int = 0
+    sent: int = 0
+    failed: int = 0
+    retries: int = 0
+    reminders_marked: int = 0
+    last_run_at: Optional[datetime] = None
+    last_run_seconds: float = 0.0
+    last_run_emails_per_second: float = 0.0
+
+reminder_metrics = ReminderMetrics()
+reminder_rate_limiter = RateLimiter(REMINDER_RATE_PER_SECOND)
+REMINDER_BACKOFF_SECONDS = 0.5
+REMINDER_USER_BATCH_SIZE = 200
+REMINDER_CLAIM_SECONDS = 3600
+
+def reminder_email_html(user: dict, transactions: List[dict]) -> str:
+    rows = "".join(
+        f"<li>{t['date'].strftime('%d/%m/%Y')} - {t['description']}: R$ {t['amount']:.2f}"
+        f" ({'entrada' if t['type'] == 'entrada' else 'saída'})</li>"
+        for t in transactions
+    )
+    return f"<p>Olá, {user['name']}!</p><p>Você tem transações próximas do vencimento:</p><ul>{rows}</ul>"
+
+async def send_with_retry(params: dict) -> bool:
+    for attempt in range(REMINDER_MAX_RETRIES + 1):
+        await reminder_rate_limiter.acquire()
+        try:
+            await reminder_transport.send(params)
+            return True
+        except Exception as e:
+            if attempt == REMINDER_MAX_RETRIES:
+                logger.error(f"Erro ao enviar lembrete para {', '.join(params['to'])}: {str(e)}")
+                return False
+            reminder_metrics.retries += 1
+            await asyncio.sleep(REMINDER_BACKOFF_SECONDS * 2 ** attempt)
+
+async def dispatch_reminder_batch(groups: List[tuple], semaphore: asyncio.Semaphore) -> int:
+    users = await db.users.find(
+        {"id": {"$in": [user_id for user_id, _ in groups]}},
+        {"_id": 0, "id": 1, "email": 1, "name": 1}
+    ).to_list(None)
+    users_map = {user['id']: user for user in users}
+    
+    async def send_group(user: dict, transactions: List[dict]) -> List[str]:
+        count = len(transactions)
+        params = {
+            "from": SENDER_EMAIL,
+            "to": [user['email']],
+            "subject": f"Lembrete: {count} transaç{'ão' if count == 1 else 'ões'} próxima{'s' if count > 1 else ''}",
+            "html": reminder_email_html(user, transactions)
         }
+        async with semaphore:
+            sent = await send_with_retry(params)
+        if not sent:
+            reminder_metrics.failed += 1
+            return []
+        reminder_metrics.sent += 1
+        return [t['id'] for t in transactions]
+    
+    groups = [(user_id, transactions) for user_id, transactions in groups if user_id in users_map]
+    results = await asyncio.gather(*(
+        send_group(users_map[user_id], transactions)
+        for user_id, transactions in groups
+    ))
+    failed_ids = [t['id'] for (_, transactions), ids in zip(groups, results) if not ids for t in transactions]
+    if failed_ids:
+        # release the claim so the next run retries them
+        await db.transactions.update_many({"id": {"$in": failed_ids}}, {"$unset": REMINDER_CLAIM_FIELDS})
+    sent_ids = [transaction_id for ids in results for transaction_id in ids]
+    if sent_ids:
+        result = await db.transactions.update_many(
+            {"id": {"$in": sent_ids}},
+            {"$set": {"reminder_sent": True}, "$unset": REMINDER_CLAIM_FIELDS}
+        )
+        reminder_metrics.reminders_marked += result.modified_count
+        await asyncio.gather(*(
+            record_changes(user_id, "transactions", upserted=ids)
+            for (user_id, _), ids in zip(groups, results) if ids
+        ))
+    return sum(1 for ids in results if ids)
+
+REMINDER_CLAIM_FIELDS = {"reminder_claim": "", "reminder_claimed_until": ""}
+
+async def claim_due_reminders(due_range: dict, now: datetime) -> str:
+    # every worker runs the dispatcher; the claim is atomic per document, so only the run that
+    # wrote it sends the reminder, and an abandoned claim expires after REMINDER_CLAIM_SECONDS
+    claim = str(uuid.uuid4())
+    await db.transactions.update_many(
+        {"has_reminder": True, "reminder_sent": False, "date": due_range, "reminder_claimed_until": {"$not": {"$gt": now}}},
+        {"$set": {"reminder_claim": claim, "reminder_claimed_until": now + timedelta(seconds=REMINDER_CLAIM_SECONDS)}}
+    )
+    return claim
+
+async def dispatch_due_reminders(now: Optional[datetime] = None) -> int:
+    started = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+    due_range = {"$gte": now - timedelta(days=REMINDER_LOOKBACK_DAYS), "$lte": now + timedelta(days=1)}
+    claim = await claim_due_reminders(due_range, now)
+    cursor = db.transactions.find(
+        {"has_reminder": True, "reminder_sent": False, "date": due_range, "reminder_claim": claim},
+        {"_id": 0, "id": 1, "user_id": 1, "date": 1, "description": 1, "amount": 1, "type": 1}
+    ).sort([("user_id", ASCENDING), ("date", ASCENDING)])
+    
+    semaphore = asyncio.Semaphore(REMINDER_CONCURRENCY)
+    emails = 0
+    groups = []
+    async for t in cursor:
+        if groups and groups[-1][0] == t['user_id']:
+            groups[-1][1].append(t)
+            continue
+        if len(groups) >= REMINDER_USER_BATCH_SIZE:
+            emails += await dispatch_reminder_batch(groups, semaphore)
+            groups = []
+        groups.append((t['user_id'], [t]))
+    if groups:
+        emails += await dispatch_reminder_batch(groups, semaphore)
+    
+    elapsed = time.perf_counter() - started
+    reminder_metrics.runs += 1
+    reminder_metrics.last_run_at = datetime.now(timezone.utc)
+    reminder_metrics.last_run_seconds = elapsed
+    reminder_metrics.last_run_emails_per_second = (emails / elapsed) if elapsed > 0 else 0
+    if emails:
+        logger.info(f"Lembretes enviados: {emails} e-mails em {elapsed:.2f}s")
+    return emails
+
+@api_router.get("/reminders/metrics", response_model=ReminderMetrics, dependencies=[Depends(require_metrics_token)])
+async def get_reminder_metrics():
+    return reminder_metrics
 
 @api_router.post("/send-reminder")
 async def send_reminder(request: EmailRequest, user_id: str = Depends(get_current_user)):
@@ -452,7 +1983,7 @@ async def send_reminder(request: EmailRequest, user_id: str = Depends(get_curren
     }
     
     try:
-        email = await asyncio.to_thread(resend.Emails.send, params)
+        email = await reminder_transport.send(params)
         return {
             "status": "success",
             "message": f"Lembrete enviado para {request.recipient_email}",
@@ -463,40 +1994,32 @@ async def send_reminder(request: EmailRequest, user_id: str = Depends(get_curren
         raise HTTPException(status_code=500, detail=f"Falha ao enviar e-mail: {str(e)}")
 
 @api_router.get("/reminders")
-async def get_pending_reminders(user_id: str = Depends(get_current_user)):
+async def get_pending_reminders(user_id: str = Depends(get_current_user), etag: str = Depends(hourly_data_version_etag)):
     now = datetime.now(timezone.utc)
     tomorrow = now + timedelta(days=1)
     
-    transactions = await db.transactions.find(
-        {"user_id": user_id, "has_reminder": True, "reminder_sent": False},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    pending = []
-    for t in transactions:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-        trans_date = datetime.fromisoformat(t['date']).replace(tzinfo=timezone.utc)
-        if trans_date <= tomorrow:
-            pending.append(Transaction(**t))
-    
-    return pending
+    pending = await db.transactions.find(
+        {"user_id": user_id, "has_reminder": True, "reminder_sent": False, "date": {"$lte": tomorrow}},
+        TRANSACTION_PROJECTION
+    ).sort("date", 1).to_list(None)
+    return ORJSONResponse(pending, headers=etag_headers(etag))
 
 @api_router.post("/budgets", response_model=Budget)
 async def create_budget(input: BudgetCreate, user_id: str = Depends(get_current_user)):
     budget_obj = Budget(user_id=user_id, **input.model_dump())
     doc = budget_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.budgets.insert_one(doc)
+    await record_changes(user_id, "budgets", upserted=[budget_obj.id])
     return budget_obj
 
 @api_router.get("/budgets", response_model=List[Budget])
-async def get_budgets(user_id: str = Depends(get_current_user)):
-    budgets = await db.budgets.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    for b in budgets:
-        if isinstance(b['created_at'], str):
-            b['created_at'] = datetime.fromisoformat(b['created_at'])
-    return budgets
+async def get_budgets(user_id: str = Depends(get_current_user), etag: str = Depends(data_version_etag)):
+    budgets = await db.budgets.find({"user_id": user_id}, BUDGET_PROJECTION).to_list(1000)
+    return ORJSONResponse(budgets, headers=etag_headers(etag))
+
+@api_router.get("/budgets/status", response_model=List[BudgetStatus])
+async def get_budgets_status(user_id: str = Depends(get_current_user), etag: str = Depends(hourly_data_version_etag)):
+    return ORJSONResponse(await get_budget_status(user_id), headers=etag_headers(etag))
 
 @api_router.put("/budgets/{budget_id}", response_model=Budget)
 async def update_budget(budget_id: str, limit: float, user_id: str = Depends(get_current_user)):
@@ -505,9 +2028,8 @@ async def update_budget(budget_id: str, limit: float, user_id: str = Depends(get
         raise HTTPException(status_code=404, detail="Orçamento não encontrado")
     
     await db.budgets.update_one({"id": budget_id}, {"$set": {"limit": limit}})
+    await record_changes(user_id, "budgets", upserted=[budget_id])
     updated = await db.budgets.find_one({"id": budget_id}, {"_id": 0})
-    if isinstance(updated['created_at'], str):
-        updated['created_at'] = datetime.fromisoformat(updated['created_at'])
     return updated
 
 @api_router.delete("/budgets/{budget_id}")
@@ -515,28 +2037,17 @@ async def delete_budget(budget_id: str, user_id: str = Depends(get_current_user)
     result = await db.budgets.delete_one({"id": budget_id, "user_id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Orçamento não encontrado")
+    await record_changes(user_id, "budgets", deleted=[budget_id])
     return {"message": "Orçamento deletado com sucesso"}
 
 @api_router.get("/categories/stats")
-async def get_categories_stats(user_id: str = Depends(get_current_user)):
+async def get_categories_stats(user_id: str = Depends(get_current_user), etag: str = Depends(hourly_data_version_etag)):
     now = datetime.now(timezone.utc)
-    month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
+    category_totals = await get_category_expenses(user_id, period_start("month", now), now)
     budgets = await db.budgets.find({"user_id": user_id, "period": "month"}, {"_id": 0}).to_list(1000)
     
     budgets_map = {b['category']: b['limit'] for b in budgets}
-    
-    category_totals = {}
-    total_expenses = 0
-    
-    for t in transactions:
-        trans_date = datetime.fromisoformat(t['date']).replace(tzinfo=timezone.utc)
-        if trans_date >= month_start and t['type'] == "saida":
-            if t['category'] not in category_totals:
-                category_totals[t['category']] = 0
-            category_totals[t['category']] += t['amount']
-            total_expenses += t['amount']
+    total_expenses = sum(category_totals.values())
     
     stats = []
     for category, total in category_totals.items():
@@ -553,10 +2064,211 @@ async def get_categories_stats(user_id: str = Depends(get_current_user)):
         ))
     
     stats.sort(key=lambda x: x.total, reverse=True)
-    return stats
+    return ORJSONResponse([s.model_dump() for s in stats], headers=etag_headers(etag))
+
+async def get_future_budget_spending(user_id: str, categories: set, now: datetime) -> dict:
+    # counters cover the whole month/year, including recurring occurrences materialized ahead;
+    # what is not due yet in the current buckets is taken back out here
+    query = {
+        "user_id": user_id,
+        "type": "saida",
+        "category": {"$in": list(categories)},
+        "date": {"$gt": now, "$lt": now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)}
+    }
+    future = {}
+    async for t in db.transactions.find(query, {"_id": 0, "date": 1, "category": 1, "amount": 1}):
+        for period in ("month", "year"):
+            key = (period, budget_bucket(period, t['date']), t['category'])
+            future[key] = future.get(key, 0.0) + t['amount']
+    return future
+
+async def get_budget_status(user_id: str, now: Optional[datetime] = None) -> List[dict]:
+    now = now or datetime.now(timezone.utc)
+    budgets = await db.budgets.find({"user_id": user_id}, BUDGET_PROJECTION).to_list(1000)
+    if not budgets:
+        return []
+    counter_keys = [
+        {"period": budget['period'], "bucket": budget_bucket(budget['period'], now), "category": budget['category']}
+        for budget in budgets
+    ]
+    counters = await db.budget_counters.find(
+        {"user_id": user_id, "$or": counter_keys},
+        {"_id": 0, "period": 1, "bucket": 1, "category": 1, "spent": 1}
+    ).to_list(None)
+    spent_map = {(c['period'], c['bucket'], c['category']): c['spent'] for c in counters}
+    for key, amount in (await get_future_budget_spending(user_id, {b['category'] for b in budgets}, now)).items():
+        if key in spent_map:
+            spent_map[key] -= amount
+    
+    status = []
+    for budget, key in zip(budgets, counter_keys):
+        spent = max(spent_map.get((key['period'], key['bucket'], key['category']), 0.0), 0.0)
+        limit = budget['limit']
+        status.append({
+            "budget_id": budget['id'],
+            "category": budget['category'],
+            "period": budget['period'],
+            "bucket": key['bucket'],
+            "limit": limit,
+            "spent": spent,
+            "remaining": limit - spent,
+            "percentage": (spent / limit * 100) if limit > 0 else 0.0,
+            "threshold_crossed": limit > 0 and spent >= limit * BUDGET_ALERT_THRESHOLD,
+            "exceeded": spent > limit
+        })
+    status.sort(key=lambda item: item['percentage'], reverse=True)
+    return status
+
+async def get_budget_alerts(user_id: str) -> List[dict]:
+    return [item for item in await get_budget_status(user_id) if item['threshold_crossed']]
+
+async def get_upcoming_transactions(user_id: str, now: Optional[datetime] = None) -> List[dict]:
+    now = now or datetime.now(timezone.utc)
+    query = {"user_id": user_id, "date": {"$gt": now, "$lte": now + timedelta(days=DASHBOARD_UPCOMING_DAYS)}}
+    return await db.transactions.find(query, TRANSACTION_PROJECTION).sort("date", 1).to_list(None)
+
+async def get_scheduled_transactions(user_id: str, now: datetime, until: Optional[datetime] = None) -> List[dict]:
+    query = {"user_id": user_id, "date": {"$gt": now}}
+    if until is not None:
+        query["date"]["$lt"] = until
+    return await db.transactions.find(query, TRANSACTION_PROJECTION).sort("date", 1).limit(DASHBOARD_SCHEDULED_LIMIT).to_list(None)
+
+@api_router.get("/dashboard", response_model=DashboardData)
+async def get_dashboard(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(hourly_data_version_etag),
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE)
+):
+    now = datetime.now(timezone.utc)
+    week_totals, (transactions, next_cursor), upcoming, scheduled, budget_alerts = await asyncio.gather(
+        get_period_totals(user_id, period_start("week", now), now),
+        fetch_transaction_page({"user_id": user_id, "date": {"$lte": now}}, limit),
+        get_upcoming_transactions(user_id, now),
+        get_scheduled_transactions(user_id, now),
+        get_budget_alerts(user_id)
+    )
+    headers = etag_headers(etag)
+    if next_cursor:
+        # continues with GET /transactions?cursor=
+        headers["X-Next-Cursor"] = next_cursor
+    return ORJSONResponse({
+        "week": period_stats(week_totals["entrada"], week_totals["saida"]),
+        "transactions": transactions,
+        "upcoming": upcoming,
+        "scheduled": scheduled,
+        "budget_alerts": budget_alerts
+    }, headers=headers)
+
+STATS_MAX_BUCKETS = 1000
+BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+
+def bucket_start(date: datetime, granularity: str) -> datetime:
+    day_start = date.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return day_start - timedelta(days=day_start.weekday())
+    if granularity == "month":
+        return day_start.replace(day=1)
+    return day_start
+
+def next_bucket(start: datetime, granularity: str) -> datetime:
+    if granularity == "month":
+        return add_months(start, 1, 1)
+    return start + timedelta(days=7 if granularity == "week" else 1)
+
+def month_span(start: datetime, end: datetime) -> Optional[int]:
+    if not (is_month_start(start) and is_month_start(end)):
+        return None
+    return (end.year - start.year) * 12 + end.month - start.month
+
+def trend_windows(start: datetime, end: datetime, periods: int) -> List[tuple]:
+    months = month_span(start, end)
+    if months:
+        return [(add_months(start, -months * i, 1), add_months(end, -months * i, 1)) for i in range(periods, 0, -1)]
+    length = end - start
+    return [(start - length * i, end - length * i) for i in range(periods, 0, -1)]
+
+async def get_range_series(user_id: str, start: datetime, end: datetime, granularity: str, group_by: Optional[str] = None) -> List[dict]:
+    group_id = {"bucket": {"$dateToString": {"format": BUCKET_FORMATS[granularity], "date": "$date"}}, "type": "$type"}
+    if group_by:
+        group_id["group"] = f"${group_by}"
+    pipeline = [
+        {"$match": period_query(user_id, start, end)},
+        {"$group": {"_id": group_id, "total": {"$sum": "$amount"}, "count": {"$sum": 1}}}
+    ]
+    return await db.transactions.aggregate(pipeline).to_list(None)
+
+@api_router.get("/stats/range", response_model=RangeStats)
+async def get_range_stats(
+    start: UtcDatetime,
+    end: UtcDatetime,
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(data_version_etag),
+    granularity: Literal["day", "week", "month"] = "day",
+    group_by: Optional[Literal["category", "type"]] = None,
+    periods: int = Query(0, ge=0, le=24)
+):
+    if end <= start:
+        raise HTTPException(status_code=400, detail="A data final deve ser posterior à inicial")
+    series = {}
+    bucket = bucket_start(start, granularity)
+    while bucket < end:
+        if len(series) >= STATS_MAX_BUCKETS:
+            raise HTTPException(status_code=400, detail="Intervalo muito grande para a granularidade escolhida")
+        key = bucket.strftime(BUCKET_FORMATS[granularity])
+        series[key] = {"key": key, "start": bucket, "income": 0.0, "expense": 0.0, "balance": 0.0, "count": 0, "groups": {}}
+        bucket = next_bucket(bucket, granularity)
+    
+    windows = trend_windows(start, end, periods)
+    rows, window_totals = await asyncio.gather(
+        get_range_series(user_id, start, end, granularity, group_by),
+        asyncio.gather(*(get_period_totals(user_id, window_start, window_end) for window_start, window_end in windows))
+    )
+    
+    for row in rows:
+        entry = series.get(row['_id']['bucket'])
+        if entry is None:
+            continue
+        field = "income" if row['_id']['type'] == "entrada" else "expense"
+        entry[field] += row['total']
+        entry['count'] += row['count']
+        if group_by:
+            group = entry['groups'].setdefault(row['_id']['group'], {"key": row['_id']['group'], "income": 0.0, "expense": 0.0, "count": 0})
+            group[field] += row['total']
+            group['count'] += row['count']
+    
+    buckets = []
+    for entry in series.values():
+        entry['balance'] = entry['income'] - entry['expense']
+        entry['groups'] = sorted(entry['groups'].values(), key=lambda group: group['income'] + group['expense'], reverse=True)
+        buckets.append(entry)
+    total_income = sum(entry['income'] for entry in buckets)
+    total_expense = sum(entry['expense'] for entry in buckets)
+    
+    trend = [
+        {"start": window_start, "end": window_end, "income": totals["entrada"], "expense": totals["saida"], "balance": totals["entrada"] - totals["saida"]}
+        for (window_start, window_end), totals in zip(windows, window_totals)
+    ]
+    if periods:
+        trend.append({"start": start, "end": end, "income": total_income, "expense": total_expense, "balance": total_income - total_expense})
+    
+    return ORJSONResponse({
+        "start": start,
+        "end": end,
+        "granularity": granularity,
+        "group_by": group_by,
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "balance": total_income - total_expense,
+        "series": buckets,
+        "trend": trend
+    }, headers=etag_headers(etag))
 
 @api_router.get("/stats/comparison")
-async def get_period_comparison(user_id: str = Depends(get_current_user)):
+async def get_period_comparison(
+    user_id: str = Depends(get_current_user),
+    etag: str = Depends(hourly_data_version_etag),
+    include_transactions: bool = True
+):
     now = datetime.now(timezone.utc)
     current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
     
@@ -565,92 +2277,173 @@ async def get_period_comparison(user_id: str = Depends(get_current_user)):
     else:
         previous_month_start = current_month_start.replace(month=now.month - 1)
     
-    transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
+    current_totals, previous_totals = await asyncio.gather(
+        get_period_totals(user_id, current_month_start, now),
+        get_period_totals(user_id, previous_month_start, current_month_start)
+    )
+    current_income, current_expense = current_totals["entrada"], current_totals["saida"]
+    previous_income, previous_expense = previous_totals["entrada"], previous_totals["saida"]
     
     current_transactions = []
     previous_transactions = []
+    if include_transactions:
+        transactions = await get_period_transactions(user_id, previous_month_start, now)
+        current_transactions = [t for t in transactions if t['date'] >= current_month_start]
+        previous_transactions = [t for t in transactions if t['date'] < current_month_start]
     
-    for t in transactions:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-        trans_date = datetime.fromisoformat(t['date']).replace(tzinfo=timezone.utc)
-        
-        if trans_date >= current_month_start:
-            current_transactions.append(Transaction(**t))
-        elif trans_date >= previous_month_start and trans_date < current_month_start:
-            previous_transactions.append(Transaction(**t))
-    
-    current_income = sum(t.amount for t in current_transactions if t.type == "entrada")
-    current_expense = sum(t.amount for t in current_transactions if t.type == "saida")
-    
-    previous_income = sum(t.amount for t in previous_transactions if t.type == "entrada")
-    previous_expense = sum(t.amount for t in previous_transactions if t.type == "saida")
-    
-    current_stats = PeriodStats(
-        total_income=current_income,
-        total_expense=current_expense,
-        balance=current_income - current_expense,
-        transactions=current_transactions
-    )
-    
-    previous_stats = PeriodStats(
-        total_income=previous_income,
-        total_expense=previous_expense,
-        balance=previous_income - previous_expense,
-        transactions=previous_transactions
-    )
+    current_stats = period_stats(current_income, current_expense, current_transactions)
+    previous_stats = period_stats(previous_income, previous_expense, previous_transactions)
     
     income_change = ((current_income - previous_income) / previous_income * 100) if previous_income > 0 else 0
     expense_change = ((current_expense - previous_expense) / previous_expense * 100) if previous_expense > 0 else 0
-    balance_change = current_stats.balance - previous_stats.balance
-    
-    return PeriodComparison(
-        current_period=current_stats,
-        previous_period=previous_stats,
-        income_change=income_change,
-        expense_change=expense_change,
-        balance_change=balance_change
-    )
-
-@api_router.get("/export/csv")
-async def export_transactions_csv(user_id: str = Depends(get_current_user)):
-    from fastapi.responses import StreamingResponse
-    import io
-    import csv
-    
-    transactions = await db.transactions.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
+    balance_change = current_stats['balance'] - previous_stats['balance']
     
+    return ORJSONResponse({
+        "current_period": current_stats,
+        "previous_period": previous_stats,
+        "income_change": income_change,
+        "expense_change": expense_change,
+        "balance_change": balance_change
+    }, headers=etag_headers(etag))
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_FIELDS = ["id", "date", "type", "category", "description", "amount", "has_reminder", "recurring_id", "created_at"]
+EXPORT_MEDIA_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+async def iter_export_batches(query: dict):
+    cursor = db.transactions.find(query, {"_id": 0, "user_id": 0}).sort(TRANSACTION_SORT).batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+    async for t in cursor:
+        batch.append(t)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def export_csv_chunks(query: dict):
     output = io.StringIO()
     writer = csv.writer(output)
-    
     writer.writerow(["Data", "Tipo", "Categoria", "Descrição", "Valor"])
+    yield output.getvalue().encode('utf-8')
     
-    for t in transactions:
-        date_str = datetime.fromisoformat(t['date']).strftime("%d/%m/%Y")
-        tipo = "Entrada" if t['type'] == "entrada" else "Saída"
-        writer.writerow([
-            date_str,
-            tipo,
-            t['category'],
-            t['description'],
-            f"R$ {t['amount']:.2f}"
-        ])
-    
-    output.seek(0)
+    async for batch in iter_export_batches(query):
+        output.seek(0)
+        output.truncate()
+        for t in batch:
+            writer.writerow([
+                t['date'].strftime("%d/%m/%Y"),
+                "Entrada" if t['type'] == "entrada" else "Saída",
+                t['category'],
+                t['description'],
+                f"R$ {t['amount']:.2f}"
+            ])
+        yield output.getvalue().encode('utf-8')
+
+async def export_ndjson_chunks(query: dict):
+    async for batch in iter_export_batches(query):
+        lines = [json.dumps({field: t.get(field) for field in EXPORT_FIELDS}, default=json_default, ensure_ascii=False) for t in batch]
+        yield ("\n".join(lines) + "\n").encode('utf-8')
+
+class ChunkSink:
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+    
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self.chunks.append(chunk)
+        self.position += len(chunk)
+        return len(chunk)
+    
+    def tell(self) -> int:
+        return self.position
+    
+    def flush(self):
+        pass
+    
+    def close(self):
+        self.closed = True
     
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+async def export_parquet_chunks(query: dict):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("date", pa.timestamp("ms", tz="UTC")),
+        ("type", pa.string()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+        ("amount", pa.float64()),
+        ("has_reminder", pa.bool_()),
+        ("recurring_id", pa.string()),
+    ])
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        async for batch in iter_export_batches(query):
+            rows = [{field: t.get(field) for field in schema.names} for t in batch]
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+@api_router.get("/export")
+@api_router.get("/export/csv")
+async def export_transactions_csv(
+    user_id: str = Depends(get_current_user),
+    format: Literal["csv", "ndjson", "parquet"] = "csv",
+    start_date: Optional[UtcDatetime] = None,
+    end_date: Optional[UtcDatetime] = None
+):
+    query = {"user_id": user_id}
+    date_range = {}
+    if start_date:
+        date_range["$gte"] = start_date
+    if end_date:
+        date_range["$lt"] = end_date
+    if date_range:
+        query["date"] = date_range
+    
+    if format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Exportação em Parquet indisponível")
+        chunks = export_parquet_chunks(query)
+    elif format == "ndjson":
+        chunks = export_ndjson_chunks(query)
+    else:
+        chunks = export_csv_chunks(query)
+    
+    media_type, extension = EXPORT_MEDIA_TYPES[format]
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=transacoes.csv"}
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=transacoes.{extension}"}
     )
 
 @api_router.get("/recurring")
-async def get_recurring_transactions(user_id: str = Depends(get_current_user)):
+async def get_recurring_transactions(user_id: str = Depends(get_current_user), etag: str = Depends(data_version_etag)):
     recurring = await db.recurring_transactions.find({"user_id": user_id, "active": True}, {"_id": 0}).to_list(1000)
-    for r in recurring:
-        if isinstance(r['created_at'], str):
-            r['created_at'] = datetime.fromisoformat(r['created_at'])
-    return recurring
+    return ORJSONResponse(recurring, headers=etag_headers(etag))
 
 @api_router.delete("/recurring/{recurring_id}")
 async def delete_recurring_transaction(recurring_id: str, user_id: str = Depends(get_current_user)):
@@ -660,59 +2453,377 @@ async def delete_recurring_transaction(recurring_id: str, user_id: str = Depends
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Transação recorrente não encontrada")
+    await record_changes(user_id, "recurring", deleted=[recurring_id])
+    
+    future_query = {"user_id": user_id, "recurring_id": recurring_id, "date": {"$gt": datetime.now(timezone.utc)}}
+    future = await db.transactions.find(future_query, CHANGE_FIELDS).to_list(None)
+    if future:
+        await db.transactions.delete_many({"user_id": user_id, "id": {"$in": [t['id'] for t in future]}})
+        await record_transaction_changes(user_id, removed=future)
     return {"message": "Recorrência cancelada com sucesso"}
 
 @api_router.post("/templates", response_model=TransactionTemplate)
 async def create_template(input: TemplateCreate, user_id: str = Depends(get_current_user)):
     template_obj = TransactionTemplate(user_id=user_id, **input.model_dump())
     doc = template_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
     await db.templates.insert_one(doc)
+    await record_changes(user_id, "templates", upserted=[template_obj.id])
     return template_obj
 
 @api_router.get("/templates", response_model=List[TransactionTemplate])
-async def get_templates(user_id: str = Depends(get_current_user)):
-    templates = await db.templates.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    for t in templates:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
-    return templates
+async def get_templates(user_id: str = Depends(get_current_user), etag: str = Depends(data_version_etag)):
+    templates = await db.templates.find({"user_id": user_id}, TEMPLATE_PROJECTION).to_list(1000)
+    return ORJSONResponse(templates, headers=etag_headers(etag))
 
 @api_router.delete("/templates/{template_id}")
 async def delete_template(template_id: str, user_id: str = Depends(get_current_user)):
     result = await db.templates.delete_one({"id": template_id, "user_id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Template não encontrado")
+    await record_changes(user_id, "templates", deleted=[template_id])
     return {"message": "Template deletado com sucesso"}
 
+class EventHubMetrics(BaseModel):
+    connections: int = 0
+    published: int = 0
+    delivered: int = 0
+    dropped: int = 0
+
+EVENT_OVERFLOW = b"event: overflow\ndata: {}\n\n"
+
+class EventHub:
+    def __init__(self, max_queue: int):
+        self.max_queue = max_queue
+        self.subscribers = {}
+        self.metrics = EventHubMetrics()
+    
+    def subscribe(self, user_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(self.max_queue)
+        self.subscribers.setdefault(user_id, set()).add(queue)
+        self.metrics.connections += 1
+        return queue
+    
+    def unsubscribe(self, user_id: str, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id)
+        if queues is None or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[user_id]
+        self.metrics.connections -= 1
+    
+    def close_queue(self, user_id: str, queue: asyncio.Queue, message: Optional[bytes]):
+        self.unsubscribe(user_id, queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(message)
+    
+    def publish(self, user_id: str, token: int, event: dict):
+        queues = self.subscribers.get(user_id)
+        if not queues:
+            return
+        message = b"id: %d\nevent: change\ndata: %s\n\n" % (token, orjson.dumps({"token": token, **event}))
+        self.metrics.published += 1
+        for queue in list(queues):
+            try:
+                queue.put_nowait(message)
+                self.metrics.delivered += 1
+            except asyncio.QueueFull:
+                self.metrics.dropped += 1
+                self.close_queue(user_id, queue, EVENT_OVERFLOW)
+    
+    def close(self):
+        for user_id, queues in list(self.subscribers.items()):
+            for queue in list(queues):
+                self.close_queue(user_id, queue, None)
+
+event_hub = EventHub(EVENTS_QUEUE_SIZE)
+
+async def event_stream(user_id: str):
+    queue = event_hub.subscribe(user_id)
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": ping\n\n"
+                continue
+            if message is None:
+                break
+            yield message
+            if message is EVENT_OVERFLOW:
+                break
+    finally:
+        event_hub.unsubscribe(user_id, queue)
+
+@api_router.post("/events/token", response_model=StreamTokenResponse)
+async def issue_stream_token(user_id: str = Depends(get_current_user)):
+    return StreamTokenResponse(token=create_stream_token(user_id), expires_in=EVENTS_TOKEN_SECONDS)
+
+@api_router.get("/events")
+async def stream_events(user_id: str = Depends(get_stream_user)):
+    return StreamingResponse(
+        event_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.get("/events/metrics", response_model=EventHubMetrics, dependencies=[Depends(require_metrics_token)])
+async def get_event_metrics():
+    return event_hub.metrics
+
+SYNC_COLLECTIONS = {
+    "transactions": ("transactions", TRANSACTION_PROJECTION, {}),
+    "budgets": ("budgets", BUDGET_PROJECTION, {}),
+    "templates": ("templates", TEMPLATE_PROJECTION, {}),
+    "recurring": ("recurring_transactions", {"_id": 0}, {"active": True}),
+}
+
+async def fetch_sync_entities(user_id: str, entity: str, ids: Optional[List[str]] = None) -> List[dict]:
+    collection_name, projection, extra_query = SYNC_COLLECTIONS[entity]
+    query = {"user_id": user_id, **extra_query}
+    if ids is not None:
+        if not ids:
+            return []
+        query["id"] = {"$in": ids}
+    return await db[collection_name].find(query, projection).to_list(None)
+
+def empty_sync_response(token: int, full: bool) -> dict:
+    return {
+        "token": token,
+        "full": full,
+        "has_more": False,
+        "changes": {entity: [] for entity in SYNC_COLLECTIONS},
+        "deleted": {entity: [] for entity in SYNC_COLLECTIONS}
+    }
+
+@api_router.get("/sync", response_model=SyncResponse)
+async def sync_changes(user_id: str = Depends(get_current_user), since: Optional[int] = Query(None, ge=0)):
+    user = await db.users.find_one({"id": user_id}, {"_id": 0, "data_version": 1, "data_version_at": 1}) or {}
+    version = user.get('data_version', 0)
+    if since is None:
+        response = empty_sync_response(version, True)
+        results = await asyncio.gather(*(fetch_sync_entities(user_id, entity) for entity in SYNC_COLLECTIONS))
+        response["changes"] = dict(zip(SYNC_COLLECTIONS, results))
+        return ORJSONResponse(response)
+    if since > version:
+        raise HTTPException(status_code=410, detail="Token de sincronização expirado")
+    
+    entries = await db.change_log.find(
+        {"user_id": user_id, "seq": {"$gt": since}},
+        {"_id": 0, "seq": 1, "entity": 1, "entity_id": 1, "op": 1, "at": 1}
+    ).sort("seq", 1).limit(SYNC_BATCH_SIZE).to_list(None)
+    
+    token = since
+    latest = {}
+    gap_at = None
+    for entry in entries:
+        if entry['seq'] != token + 1:
+            gap_at = entry['at']
+            break
+        latest[(entry['entity'], entry['entity_id'])] = entry['op']
+        token = entry['seq']
+    if gap_at is None and token < version and len(entries) < SYNC_BATCH_SIZE:
+        gap_at = user.get('data_version_at') or datetime.min.replace(tzinfo=timezone.utc)
+    if gap_at is not None and gap_at < datetime.now(timezone.utc) - timedelta(seconds=SYNC_GAP_GRACE_SECONDS):
+        raise HTTPException(status_code=410, detail="Token de sincronização expirado")
+    
+    response = empty_sync_response(token, False)
+    response["has_more"] = token < version
+    upserted = {entity: [] for entity in SYNC_COLLECTIONS}
+    for (entity, entity_id), op in latest.items():
+        if entity in SYNC_COLLECTIONS:
+            (upserted if op == "upsert" else response["deleted"])[entity].append(entity_id)
+    results = await asyncio.gather(*(fetch_sync_entities(user_id, entity, ids) for entity, ids in upserted.items()))
+    for (entity, ids), docs in zip(upserted.items(), results):
+        response["changes"][entity] = docs
+        found = {doc['id'] for doc in docs}
+        response["deleted"][entity].extend(entity_id for entity_id in ids if entity_id not in found)
+    return ORJSONResponse(response)
+
+ORDER_STEP = 1024
+
+def increasing_positions(values: List[int]) -> set:
+    tails = []
+    tail_positions = []
+    previous = [-1] * len(values)
+    for position, value in enumerate(values):
+        slot = bisect.bisect_left(tails, value)
+        if slot > 0:
+            previous[position] = tail_positions[slot - 1]
+        if slot == len(tails):
+            tails.append(value)
+            tail_positions.append(position)
+        else:
+            tails[slot] = value
+            tail_positions[slot] = position
+    
+    kept = set()
+    position = tail_positions[-1] if tail_positions else -1
+    while position >= 0:
+        kept.add(position)
+        position = previous[position]
+    return kept
+
+def sparse_order(current: List[int]) -> List[int]:
+    kept = increasing_positions(current)
+    if not kept:
+        return [position * ORDER_STEP for position in range(len(current))]
+    
+    order = list(current)
+    position = 0
+    while position < len(order):
+        if position in kept:
+            position += 1
+            continue
+        run_end = position
+        while run_end < len(order) and run_end not in kept:
+            run_end += 1
+        count = run_end - position
+        low = order[position - 1] if position > 0 else None
+        high = order[run_end] if run_end < len(order) else None
+        if low is None:
+            low = high - (count + 1) * ORDER_STEP
+        if high is None:
+            high = low + (count + 1) * ORDER_STEP
+        step = (high - low) // (count + 1)
+        if step < 1:
+            return [index * ORDER_STEP for index in range(len(current))]
+        for offset in range(count):
+            order[position + offset] = low + step * (offset + 1)
+        position = run_end
+    return order
+
 @api_router.post("/transactions/reorder")
 async def reorder_transactions(request: ReorderRequest, user_id: str = Depends(get_current_user)):
-    for index, transaction_id in enumerate(request.transaction_ids):
-        await db.transactions.update_one(
-            {"id": transaction_id, "user_id": user_id},
-            {"$set": {"order_index": index}}
+    existing = await db.transactions.find(
+        {"user_id": user_id, "id": {"$in": request.transaction_ids}},
+        {"_id": 0, "id": 1, "order_index": 1}
+    ).to_list(None)
+    current_map = {t['id']: t.get('order_index', 0) for t in existing}
+    transaction_ids = [transaction_id for transaction_id in dict.fromkeys(request.transaction_ids) if transaction_id in current_map]
+    
+    current = [current_map[transaction_id] for transaction_id in transaction_ids]
+    order = sparse_order(current)
+    changed = [(transaction_id, index) for transaction_id, old_index, index in zip(transaction_ids, current, order) if old_index != index]
+    operations = [
+        UpdateOne({"id": transaction_id, "user_id": user_id}, {"$set": {"order_index": index}})
+        for transaction_id, index in changed
+    ]
+    if operations:
+        await db.transactions.bulk_write(operations, ordered=False)
+        await record_changes(user_id, "transactions", upserted=[transaction_id for transaction_id, _ in changed])
+    return {"message": "Transações reordenadas com sucesso", "updated": len(operations)}
+
+def suggestion_score(term: dict, now: datetime) -> float:
+    age_days = max((now - term['last_used']).total_seconds(), 0) / 86400
+    return term['count'] * 0.5 ** (age_days / SUGGEST_HALF_LIFE_DAYS)
+
+@api_router.get("/search/suggest", response_model=List[SearchSuggestion])
+async def suggest_search_terms(
+    q: str = Query(..., min_length=1, max_length=100),
+    user_id: str = Depends(get_current_user),
+    field: Optional[Literal["description", "category"]] = None,
+    limit: int = Query(8, ge=1, le=20)
+):
+    prefix = fold_text(q)
+    if not prefix:
+        return []
+    query = {"user_id": user_id, "key": {"$gte": prefix, "$lt": prefix + "\uffff"}, "count": {"$gt": 0}}
+    if field:
+        query["field"] = field
+    terms = await db.search_terms.find(query, {"_id": 0}).sort([("count", DESCENDING), ("last_used", DESCENDING)]).limit(SUGGEST_SCAN_LIMIT).to_list(None)
+    
+    now = datetime.now(timezone.utc)
+    terms.sort(key=lambda term: suggestion_score(term, now), reverse=True)
+    return [
+        SearchSuggestion(
+            field=term['field'],
+            text=term['term'],
+            count=term['count'],
+            category=term.get('category'),
+            amount=term.get('amount'),
+            type=term.get('type')
         )
-    return {"message": "Transações reordenadas com sucesso"}
+        for term in terms[:limit]
+    ]
+
+SEARCH_PREFIX_EXPANSIONS = 20
+SEARCH_WORD_RE = re.compile(r"\w+")
+
+async def expand_search_prefixes(user_id: str, q: str) -> str:
+    # $text only matches whole (stemmed) words; while the user is still typing, "merc" must also
+    # find "Mercado", so each word is extended with the user's known words that start with it
+    tokens = [token for token in fold_text(q).split() if not token.startswith("-")]
+    prefixes = list(dict.fromkeys(SEARCH_WORD_RE.findall(" ".join(tokens))))
+    if not prefixes:
+        return q
+    pattern = "|".join(re.escape(prefix) for prefix in prefixes)
+    terms = await db.search_terms.find(
+        {"user_id": user_id, "key": {"$regex": f"(^|\\W)({pattern})"}, "count": {"$gt": 0}},
+        {"_id": 0, "key": 1}
+    ).sort("count", DESCENDING).limit(SUGGEST_SCAN_LIMIT).to_list(None)
+    
+    expansions = {prefix: [] for prefix in prefixes}
+    for term in terms:
+        for word in SEARCH_WORD_RE.findall(term['key']):
+            for prefix, words in expansions.items():
+                if word != prefix and word.startswith(prefix) and word not in words and len(words) < SEARCH_PREFIX_EXPANSIONS:
+                    words.append(word)
+    return " ".join([q, *(word for words in expansions.values() for word in words)])
+
+def encode_search_cursor(transaction: dict) -> str:
+    payload = {"s": transaction['score'], "i": transaction['id']}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+def search_cursor_query(token: str) -> dict:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        score = float(payload['s'])
+        transaction_id = str(payload['i'])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {"$or": [
+        {"score": {"$lt": score}},
+        {"score": score, "id": {"$gt": transaction_id}}
+    ]}
 
 @api_router.get("/search")
-async def search_transactions(q: str, user_id: str = Depends(get_current_user)):
-    transactions = await db.transactions.find(
-        {
-            "user_id": user_id,
-            "$or": [
-                {"description": {"$regex": q, "$options": "i"}},
-                {"category": {"$regex": q, "$options": "i"}}
-            ]
-        },
-        {"_id": 0}
-    ).to_list(1000)
+async def search_transactions(
+    q: str = Query(..., min_length=1, max_length=200),
+    user_id: str = Depends(get_current_user),
+    type: Optional[Literal["entrada", "saida"]] = None,
+    category: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    start_date: Optional[UtcDatetime] = None,
+    end_date: Optional[UtcDatetime] = None,
+    limit: int = Query(TRANSACTIONS_PAGE_SIZE, ge=1, le=TRANSACTIONS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    query = {
+        "user_id": user_id,
+        "$text": {"$search": await expand_search_prefixes(user_id, q), "$language": SEARCH_LANGUAGE},
+        **transaction_filters(type, category, min_amount, max_amount, start_date, end_date)
+    }
     
-    for t in transactions:
-        if isinstance(t['created_at'], str):
-            t['created_at'] = datetime.fromisoformat(t['created_at'])
+    pipeline = [
+        {"$match": query},
+        {"$addFields": {"score": {"$meta": "textScore"}}}
+    ]
+    if cursor:
+        pipeline.append({"$match": search_cursor_query(cursor)})
+    pipeline.append({"$sort": {"score": -1, "id": 1}})
+    pipeline.append({"$limit": limit + 1})
+    pipeline.append({"$project": {**TRANSACTION_PROJECTION, "score": 1}})
+    transactions = await db.transactions.aggregate(pipeline).to_list(None)
     
-    transactions.sort(key=lambda x: datetime.fromisoformat(x['date']), reverse=True)
-    return transactions
+    headers = {}
+    if len(transactions) > limit:
+        transactions = transactions[:limit]
+        headers["X-Next-Cursor"] = encode_search_cursor(transactions[-1])
+    return ORJSONResponse(transactions, headers=headers)
 
 app.include_router(api_router)
 
@@ -722,8 +2833,264 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+DATE_MIGRATIONS = [
+    ("transactions", "date"),
+    ("transactions", "created_at"),
+    ("users", "created_at"),
+    ("budgets", "created_at"),
+    ("templates", "created_at"),
+    ("recurring_transactions", "created_at"),
+]
+
+async def migrate_string_dates(collection_name: str, field: str, batch_size: int = 500) -> int:
+    collection = db[collection_name]
+    cursor = collection.find({field: {"$type": "string"}}, {"_id": 1, field: 1})
+    operations = []
+    migrated = 0
+    
+    async for doc in cursor:
+        date_value = ensure_utc(datetime.fromisoformat(doc[field]))
+        operations.append(UpdateOne({"_id": doc['_id']}, {"$set": {field: date_value}}))
+        if len(operations) >= batch_size:
+            await collection.bulk_write(operations, ordered=False)
+            migrated += len(operations)
+            operations = []
+    
+    if operations:
+        await collection.bulk_write(operations, ordered=False)
+        migrated += len(operations)
+    
+    if migrated:
+        logger.info(f"Campo {field} convertido para BSON date em {migrated} documentos de {collection_name}")
+    return migrated
+
+async def migrate_dates():
+    for collection_name, field in DATE_MIGRATIONS:
+        await migrate_string_dates(collection_name, field)
+
+async def ensure_indexes():
+    for collection_name, indexes in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        missing = [index for index in indexes if index.document['name'] not in existing]
+        if not missing:
+            continue
+        try:
+            created = await collection.create_indexes(missing)
+            logger.info(f"Índices criados em {collection_name}: {', '.join(created)}")
+        except OperationFailure as e:
+            logger.error(f"Erro ao criar índices em {collection_name}: {str(e)}")
+
+STARTUP_LOCK_SECONDS = 600
+
+async def acquire_startup_lock(name: str, seconds: int = STARTUP_LOCK_SECONDS) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await db.startup_locks.update_one(
+            {"_id": name, "expires_at": {"$lt": now}},
+            {"$set": {"expires_at": now + timedelta(seconds=seconds)}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+async def ensure_derived(name: str, collection, rebuild):
+    if await collection.estimated_document_count() > 0 or await db.transactions.estimated_document_count() == 0:
+        return
+    # several workers may start together; only the lock holder rebuilds
+    if not await acquire_startup_lock(name):
+        logger.info(f"Reconstrução de {name} já em andamento em outro processo")
+        return
+    try:
+        if await collection.estimated_document_count() == 0:
+            await rebuild()
+    finally:
+        await db.startup_locks.delete_one({"_id": name})
+
+async def ensure_rollups():
+    await ensure_derived("monthly_rollups", db.monthly_rollups, rebuild_rollups)
+
+async def ensure_budget_counters():
+    await ensure_derived("budget_counters", db.budget_counters, rebuild_budget_counters)
+
+async def ensure_search_terms():
+    await ensure_derived("search_terms", db.search_terms, rebuild_search_terms)
+
+RECURRING_BATCH_SIZE = 100
+
+def parse_rule_date(value) -> datetime:
+    if isinstance(value, datetime):
+        return ensure_utc(value)
+    return ensure_utc(datetime.fromisoformat(value))
+
+def add_months(date: datetime, months: int, day: int) -> datetime:
+    month_index = date.month - 1 + months
+    year = date.year + month_index // 12
+    month = month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+def recurring_occurrences(rule: dict, after: datetime, until: datetime) -> List[datetime]:
+    first = parse_rule_date(rule['start_date'])
+    if rule.get('end_date'):
+        until = min(until, parse_rule_date(rule['end_date']))
+    occurrences = []
+    if until < first:
+        return occurrences
+    
+    frequency = rule['frequency']
+    if frequency in ("daily", "weekly"):
+        weekdays = set(rule.get('weekdays') or [(first.weekday() + 1) % 7])
+        current = first + timedelta(days=max(0, (after - first).days))
+        while current <= until:
+            if current > after and (frequency == "daily" or (current.weekday() + 1) % 7 in weekdays):
+                occurrences.append(current)
+            current += timedelta(days=1)
+        return occurrences
+    
+    if frequency == "monthly":
+        step, day = 1, rule.get('day_of_month') or first.day
+    else:
+        step, day = 12, first.day
+    months_elapsed = (after.year - first.year) * 12 + after.month - first.month
+    index = max(0, months_elapsed // step - 1)
+    while True:
+        current = add_months(first, index * step, day)
+        if current > until:
+            return occurrences
+        if current > after and current >= first:
+            occurrences.append(current)
+        index += 1
+
+def recurring_horizon(now: Optional[datetime] = None) -> datetime:
+    return period_start("day", now) + timedelta(days=RECURRING_HORIZON_DAYS)
+
+async def materialize_recurring_rule(rule: dict, horizon: datetime) -> int:
+    after = ensure_utc(rule.get('materialized_until') or parse_rule_date(rule['start_date']) - timedelta(microseconds=1))
+    docs = []
+    for date in recurring_occurrences(rule, after, horizon):
+        transaction_obj = Transaction(
+            user_id=rule['user_id'],
+            amount=rule['amount'],
+            date=date,
+            type=rule['type'],
+            category=rule['category'],
+            description=f"{rule['description']} (Recorrente)",
+            has_reminder=rule.get('has_reminder', False),
+            recurring_id=rule['id']
+        )
+        doc = transaction_obj.model_dump()
+        docs.append(doc)
+    
+    inserted = 0
+    for start in range(0, len(docs), IMPORT_BATCH_SIZE):
+        batch_inserted, _ = await insert_transaction_batch(rule['user_id'], docs[start:start + IMPORT_BATCH_SIZE])
+        inserted += batch_inserted
+    # a rule starting past the horizon keeps its start as the watermark, and a slower concurrent run never lowers it
+    watermark = max(after, horizon)
+    await db.recurring_transactions.update_one(
+        {"id": rule['id'], "$or": [{"materialized_until": None}, {"materialized_until": {"$lt": watermark}}]},
+        {"$set": {"materialized_until": watermark}}
+    )
+    return inserted
+
+async def materialize_recurring_transactions(now: Optional[datetime] = None) -> int:
+    horizon = recurring_horizon(now)
+    query = {
+        "active": True,
+        "$or": [{"materialized_until": {"$exists": False}}, {"materialized_until": None}, {"materialized_until": {"$lt": horizon}}]
+    }
+    cursor = db.recurring_transactions.find(query, {"_id": 0}).batch_size(RECURRING_BATCH_SIZE)
+    inserted = 0
+    batch = []
+    async for rule in cursor:
+        batch.append(rule)
+        if len(batch) >= RECURRING_BATCH_SIZE:
+            inserted += sum(await asyncio.gather(*(materialize_recurring_rule(r, horizon) for r in batch)))
+            batch = []
+    if batch:
+        inserted += sum(await asyncio.gather(*(materialize_recurring_rule(r, horizon) for r in batch)))
+    
+    if inserted:
+        logger.info(f"Recorrências materializadas: {inserted} transações até {horizon.date().isoformat()}")
+    return inserted
+
+async def run_periodically(name: str, job, interval_seconds: int):
+    while True:
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Erro na tarefa {name}: {str(e)}")
+        await asyncio.sleep(interval_seconds)
+
+async def run_daily(name: str, job, hour: int):
+    while True:
+        now = datetime.now(timezone.utc)
+        next_run = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
+        try:
+            await job()
+        except Exception as e:
+            logger.error(f"Erro na tarefa {name}: {str(e)}")
+
+background_tasks = []
+
+@app.on_event("startup")
+async def startup_db_client():
+    await migrate_dates()
+    await ensure_indexes()
+    await ensure_rollups()
+    await ensure_search_terms()
+    await ensure_budget_counters()
+    if RECURRING_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodically("recorrências", materialize_recurring_transactions, RECURRING_INTERVAL_SECONDS)
+        ))
+    if REMINDER_INTERVAL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(
+            run_periodically("lembretes", dispatch_due_reminders, REMINDER_INTERVAL_SECONDS)
+        ))
+    if 0 <= TIPS_PRECOMPUTE_HOUR < 24:
+        background_tasks.append(asyncio.create_task(run_daily("dicas", precompute_tips, TIPS_PRECOMPUTE_HOUR)))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    event_hub.close()
+    password_hasher.shutdown()
     client.close()
+
+async def run_rollup_command(command: str, user_id: Optional[str] = None) -> int:
+    await migrate_dates()
+    if command == "rebuild-rollups":
+        await rebuild_rollups(user_id)
+        return 0
+    if command == "rebuild-search-terms":
+        await rebuild_search_terms(user_id)
+        return 0
+    if command == "rebuild-budget-counters":
+        await rebuild_budget_counters(user_id)
+        return 0
+    mismatches = await verify_rollups(user_id)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f"{len(mismatches)} resumos divergentes")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    
+    parser = argparse.ArgumentParser(description="Manutenção dos resumos mensais, termos de busca e contadores de orçamento")
+    parser.add_argument("command", choices=["rebuild-rollups", "verify-rollups", "rebuild-search-terms", "rebuild-budget-counters"])
+    parser.add_argument("--user-id")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run_rollup_command(args.command, args.user_id)))
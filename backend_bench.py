@@ -0,0 +1,310 @@
+"""Load test for the Meu Fluxo API.
+
+Seeds a throwaway database with bulk inserts, starts the FastAPI app in-process
+(or under uvicorn) and drives a weighted mix of endpoints at a fixed
+concurrency. Results are printed as JSON so runs can be diffed between releases:
+
+    python backend_bench.py --users 20 --transactions 2000 --concurrency 16 --duration 30 --output bench.json
+
+Without --mongo-url the app runs against mongomock-motor (pip install
+mongomock-motor). Pass --mongo-url mongodb://localhost:27017 to use a local
+mongod; the --db-name database is dropped before seeding.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+PASSWORD = "bench-password"
+CATEGORIES = ["Alimentação", "Transporte", "Moradia", "Saúde", "Lazer", "Educação", "Salário", "Outros"]
+DESCRIPTIONS = ["Mercado", "Padaria", "Uber", "Aluguel", "Farmácia", "Cinema", "Curso online", "Restaurante", "Combustível", "Academia"]
+SEARCH_TERMS = ["mercado", "uber", "aluguel", "farmacia", "cinema", "restaurante"]
+INSERT_BATCH_SIZE = 1000
+
+# name -> (weight, request builder); "search" needs a $text index and is skipped on mongomock
+ENDPOINTS = {
+    "login": (1, None),
+    "dashboard": (4, lambda rng, now: ("/api/dashboard", {"limit": 20})),
+    "stats_month": (2, lambda rng, now: ("/api/stats/month", None)),
+    "stats_range": (2, lambda rng, now: ("/api/stats/range", {
+        "start": (now - timedelta(days=365)).isoformat(),
+        "end": now.isoformat(),
+        "granularity": "month",
+        "group_by": "category"
+    })),
+    "search": (2, lambda rng, now: ("/api/search", {"q": rng.choice(SEARCH_TERMS), "limit": 50})),
+    "search_suggest": (2, lambda rng, now: ("/api/search/suggest", {"q": rng.choice(SEARCH_TERMS)[:3]})),
+    "export": (1, lambda rng, now: ("/api/export", {"format": "csv", "start_date": (now - timedelta(days=90)).isoformat()})),
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Meu Fluxo API load test")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--transactions", type=int, default=1000, help="transactions per user")
+    parser.add_argument("--recurring", type=int, default=5, help="recurring rules per user")
+    parser.add_argument("--budgets", type=int, default=4, help="budgets per user")
+    parser.add_argument("--templates", type=int, default=5, help="templates per user")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=2.0, help="seconds of unmeasured load before measuring")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="comma separated subset of the mix")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongo-url", default=None, help="local mongod to use instead of mongomock-motor")
+    parser.add_argument("--db-name", default="meu_fluxo_bench")
+    parser.add_argument("--uvicorn", action="store_true", help="serve the app over HTTP with uvicorn instead of ASGI in-process")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--output", default=None, help="write the JSON report to this file instead of stdout")
+    return parser.parse_args()
+
+def load_server(args):
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    os.environ["RECURRING_INTERVAL_SECONDS"] = "0"
+    os.environ["REMINDER_INTERVAL_SECONDS"] = "0"
+    os.environ["TIPS_PRECOMPUTE_HOUR"] = "-1"
+    sys.path.insert(0, BACKEND_DIR)
+
+    if not args.mongo_url:
+        try:
+            import motor.motor_asyncio
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("mongomock-motor is not installed; pip install mongomock-motor or pass --mongo-url")
+        motor.motor_asyncio.AsyncIOMotorClient = lambda url, **kwargs: AsyncMongoMockClient(**kwargs)
+
+    import server
+    if not args.mongo_url:
+        # mongomock enforces unique indexes on every document, ignoring partialFilterExpression
+        for name, indexes in server.INDEXES.items():
+            server.INDEXES[name] = [
+                index for index in indexes
+                if not (index.document.get("unique") and "partialFilterExpression" in index.document)
+            ]
+    return server
+
+async def insert_batches(collection, docs):
+    for start in range(0, len(docs), INSERT_BATCH_SIZE):
+        await collection.insert_many(docs[start:start + INSERT_BATCH_SIZE])
+
+async def seed(server, args, rng):
+    db = server.db
+    now = datetime.now(timezone.utc)
+    password_hash = server.bcrypt_hash(PASSWORD, server.password_hasher.rounds)
+    users = [
+        server.User(email=f"bench{i}@meufluxo.dev", name=f"Bench {i}", password_hash=password_hash).model_dump()
+        for i in range(args.users)
+    ]
+    transactions, recurring, budgets, templates = [], [], [], []
+    for user in users:
+        for _ in range(args.transactions):
+            kind = "entrada" if rng.random() < 0.2 else "saida"
+            transactions.append(server.Transaction(
+                user_id=user['id'],
+                amount=round(rng.uniform(5, 3000 if kind == "entrada" else 500), 2),
+                date=now - timedelta(days=rng.uniform(-30, 730)),
+                type=kind,
+                category="Salário" if kind == "entrada" else rng.choice(CATEGORIES[:-2]),
+                description=rng.choice(DESCRIPTIONS),
+                has_reminder=rng.random() < 0.05
+            ).model_dump())
+        for i in range(args.recurring):
+            start = now - timedelta(days=rng.randint(0, 365))
+            recurring.append(server.RecurringTransaction(
+                user_id=user['id'],
+                amount=round(rng.uniform(20, 300), 2),
+                type="saida",
+                category=rng.choice(CATEGORIES[:-2]),
+                description=f"{rng.choice(DESCRIPTIONS)} mensal",
+                frequency="monthly",
+                day_of_month=start.day,
+                start_date=start.isoformat(),
+                materialized_until=now
+            ).model_dump())
+        for category in rng.sample(CATEGORIES[:-2], min(args.budgets, len(CATEGORIES) - 2)):
+            budgets.append(server.Budget(
+                user_id=user['id'],
+                category=category,
+                limit=round(rng.uniform(200, 2000), 2),
+                period=rng.choice(["month", "year"])
+            ).model_dump())
+        for i in range(args.templates):
+            templates.append(server.TransactionTemplate(
+                user_id=user['id'],
+                name=f"Template {i}",
+                amount=round(rng.uniform(10, 200), 2),
+                type="saida",
+                category=rng.choice(CATEGORIES[:-2]),
+                description=rng.choice(DESCRIPTIONS)
+            ).model_dump())
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        insert_batches(db.users, users),
+        insert_batches(db.transactions, transactions),
+        insert_batches(db.recurring_transactions, recurring),
+        insert_batches(db.budgets, budgets),
+        insert_batches(db.templates, templates)
+    )
+    await server.rebuild_rollups()
+    await server.rebuild_search_terms()
+    await server.rebuild_budget_counters()
+    return users, time.perf_counter() - started
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return round(sorted_values[index] * 1000, 3)
+
+def summarize(samples, errors, duration):
+    endpoints = {}
+    for name in sorted(samples.keys() | errors.keys()):
+        latencies = sorted(samples.get(name, []))
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": errors.get(name, 0),
+            "rps": round(len(latencies) / duration, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+        }
+    all_latencies = sorted(latency for values in samples.values() for latency in values)
+    total = {
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "rps": round(len(all_latencies) / duration, 2),
+        "p50_ms": percentile(all_latencies, 0.50),
+        "p95_ms": percentile(all_latencies, 0.95),
+        "p99_ms": percentile(all_latencies, 0.99),
+    }
+    return total, endpoints
+
+async def login(client, user):
+    response = await client.post("/api/auth/login", json={"email": user['email'], "password": PASSWORD})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+async def drive(client, users, mix, args, rng):
+    tokens = {}
+    for user in users:
+        tokens[user['id']] = await login(client, user)
+
+    names = list(mix)
+    weights = [mix[name][0] for name in names]
+    samples = {name: [] for name in names}
+    errors = {}
+    now = datetime.now(timezone.utc)
+    measure_from = time.perf_counter() + args.warmup
+    stop_at = measure_from + args.duration
+
+    async def worker(worker_rng):
+        while time.perf_counter() < stop_at:
+            name = worker_rng.choices(names, weights)[0]
+            user = worker_rng.choice(users)
+            started = time.perf_counter()
+            try:
+                if name == "login":
+                    await login(client, user)
+                else:
+                    path, params = mix[name][1](worker_rng, now)
+                    response = await client.get(path, params=params, headers=tokens[user['id']])
+                    await response.aread()
+                    response.raise_for_status()
+            except httpx.HTTPError:
+                if started >= measure_from:
+                    errors[name] = errors.get(name, 0) + 1
+                continue
+            if started >= measure_from:
+                samples[name].append(time.perf_counter() - started)
+
+    await asyncio.gather(*(worker(random.Random(rng.random())) for _ in range(args.concurrency)))
+    return samples, errors
+
+async def run(args):
+    server = load_server(args)
+    rng = random.Random(args.seed)
+
+    mix = {name: ENDPOINTS[name] for name in args.endpoints.split(",") if name in ENDPOINTS}
+    if not args.mongo_url and "search" in mix:
+        print("⚠️  mongomock does not support $text; skipping the search endpoint", file=sys.stderr)
+        del mix["search"]
+    if not mix:
+        sys.exit("No known endpoints selected")
+
+    if args.mongo_url:
+        await server.client.drop_database(args.db_name)
+    users, seed_seconds = await seed(server, args, rng)
+    print(f"🌱 Seeded {args.users} users x {args.transactions} transactions in {seed_seconds:.2f}s", file=sys.stderr)
+
+    uvicorn_server = None
+    if args.uvicorn:
+        import uvicorn
+        uvicorn_server = uvicorn.Server(uvicorn.Config(server.app, host="127.0.0.1", port=args.port, log_level="warning"))
+        serve_task = asyncio.create_task(uvicorn_server.serve())
+        while not uvicorn_server.started:
+            await asyncio.sleep(0.05)
+        client = httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}",
+            limits=httpx.Limits(max_connections=args.concurrency),
+            timeout=60
+        )
+    else:
+        await server.app.router.startup()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://bench", timeout=60)
+
+    try:
+        async with client:
+            samples, errors = await drive(client, users, mix, args, rng)
+    finally:
+        if uvicorn_server:
+            uvicorn_server.should_exit = True
+            await serve_task
+        else:
+            await server.app.router.shutdown()
+
+    total, endpoints = summarize(samples, errors, args.duration)
+    return {
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "backend": "mongod" if args.mongo_url else "mongomock",
+            "transport": "uvicorn" if args.uvicorn else "asgi",
+            "users": args.users,
+            "transactions_per_user": args.transactions,
+            "recurring_per_user": args.recurring,
+            "budgets_per_user": args.budgets,
+            "templates_per_user": args.templates,
+            "concurrency": args.concurrency,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "seed": args.seed,
+            "mix": {name: weight for name, (weight, _) in mix.items()},
+        },
+        "seed_seconds": round(seed_seconds, 3),
+        "total": total,
+        "endpoints": endpoints,
+    }
+
+def main():
+    args = parse_args()
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+        print(f"📊 Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+    return 1 if report["total"]["errors"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
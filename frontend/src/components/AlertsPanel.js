@@ -1,45 +1,23 @@
-import React, { useState, useEffect } from "react";
-import axios from "axios";
+import React, { useState } from "react";
 import { Bell, X } from "lucide-react";
 import { Button } from "@/components/ui/button";
 
-const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
-const API = `${BACKEND_URL}/api`;
-
-const AlertsPanel = () => {
-  const [alerts, setAlerts] = useState([]);
+const AlertsPanel = ({ upcoming = [], budgetAlerts = [] }) => {
   const [dismissed, setDismissed] = useState([]);
 
-  useEffect(() => {
-    fetchAlerts();
-  }, []);
-
-  const fetchAlerts = async () => {
-    try {
-      const response = await axios.get(`${API}/transactions`);
-      const transactions = response.data;
-      
-      const now = new Date();
-      const threeDaysFromNow = new Date();
-      threeDaysFromNow.setDate(now.getDate() + 3);
-
-      const upcomingAlerts = transactions
-        .filter(t => {
-          const transDate = new Date(t.date);
-          return transDate > now && transDate <= threeDaysFromNow;
-        })
-        .map(t => ({
-          id: t.id,
-          message: `${t.type === "entrada" ? "💰" : "💳"} ${t.description} - R$ ${t.amount.toFixed(2)}`,
-          date: new Date(t.date),
-          type: t.type,
-        }));
-
-      setAlerts(upcomingAlerts);
-    } catch (error) {
-      console.error("Erro ao buscar alertas:", error);
-    }
-  };
+  const alerts = [
+    ...budgetAlerts.map(b => ({
+      id: `budget-${b.budget_id}`,
+      message: `⚠️ Orçamento de ${b.category}: ${b.percentage.toFixed(0)}% usado`,
+      detail: `R$ ${b.spent.toFixed(2)} de R$ ${b.limit.toFixed(2)} ${b.period === "year" ? "no ano" : "no mês"}`,
+    })),
+    ...upcoming.map(t => ({
+      id: t.id,
+      message: `${t.type === "entrada" ? "💰" : "💳"} ${t.description} - R$ ${t.amount.toFixed(2)}`,
+      date: new Date(t.date),
+      type: t.type,
+    })),
+  ];
 
   const handleDismiss = (alertId) => {
     setDismissed([...dismissed, alertId]);
@@ -54,7 +32,7 @@ const AlertsPanel = () => {
   return (
     <div className="fixed bottom-6 right-6 z-50 space-y-2" data-testid="alerts-panel">
       {visibleAlerts.map((alert) => {
-        const daysUntil = Math.ceil((alert.date - new Date()) / (1000 * 60 * 60 * 24));
+        const daysUntil = alert.date && Math.ceil((alert.date - new Date()) / (1000 * 60 * 60 * 24));
         
         return (
           <div
@@ -71,11 +49,13 @@ const AlertsPanel = () => {
                   {alert.message}
                 </p>
                 <p className="text-xs text-muted-foreground mt-1">
-                  {daysUntil === 0
-                    ? "Hoje"
-                    : daysUntil === 1
-                    ? "Amanhã"
-                    : `Em ${daysUntil} dias`} - {alert.date.toLocaleDateString("pt-BR")}
+                  {alert.date
+                    ? `${daysUntil === 0
+                        ? "Hoje"
+                        : daysUntil === 1
+                        ? "Amanhã"
+                        : `Em ${daysUntil} dias`} - ${alert.date.toLocaleDateString("pt-BR")}`
+                    : alert.detail}
                 </p>
               </div>
               <Button
@@ -45,6 +45,7 @@ const TransactionModal = ({ open, onClose, onSave, transaction }) => {
   const [saveAsTemplate, setSaveAsTemplate] = useState(false);
   const [templateName, setTemplateName] = useState("");
   const [templatesModalOpen, setTemplatesModalOpen] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
 
   useEffect(() => {
     if (transaction) {
@@ -79,6 +80,40 @@ const TransactionModal = ({ open, onClose, onSave, transaction }) => {
     }
   }, [transaction, open]);
 
+  useEffect(() => {
+    const query = formData.description.trim();
+    if (transaction || query.length < 2) {
+      setSuggestions([]);
+      return;
+    }
+    const timeout = setTimeout(async () => {
+      try {
+        const response = await axios.get(`${API}/search/suggest`, {
+          params: { q: query, field: "description" },
+        });
+        setSuggestions(response.data);
+      } catch (error) {
+        setSuggestions([]);
+      }
+    }, 150);
+    return () => clearTimeout(timeout);
+  }, [formData.description, transaction]);
+
+  const handleDescriptionChange = (value) => {
+    const suggestion = suggestions.find((s) => s.text === value);
+    if (suggestion) {
+      setFormData({
+        ...formData,
+        description: value,
+        category: formData.category || suggestion.category || "",
+        type: suggestion.type || formData.type,
+        amount: formData.amount || (suggestion.amount != null ? suggestion.amount.toString() : ""),
+      });
+      return;
+    }
+    setFormData({ ...formData, description: value });
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();
     const data = {
@@ -241,12 +276,17 @@ const TransactionModal = ({ open, onClose, onSave, transaction }) => {
               <Input
                 id="description"
                 value={formData.description}
-                onChange={(e) =>
-                  setFormData({ ...formData, description: e.target.value })
-                }
+                onChange={(e) => handleDescriptionChange(e.target.value)}
+                list="description-suggestions"
+                autoComplete="off"
                 required
                 data-testid="description-input"
               />
+              <datalist id="description-suggestions">
+                {suggestions.map((s) => (
+                  <option key={s.text} value={s.text} />
+                ))}
+              </datalist>
             </div>
 
             <div className="flex items-center justify-between py-2">
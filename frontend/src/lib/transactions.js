@@ -0,0 +1,77 @@
+import axios from "axios";
+
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+const API = `${BACKEND_URL}/api`;
+
+export const nextCursor = (response) => response.headers["x-next-cursor"] || null;
+
+// Com termo de busca a consulta vai para /search; só com filtros, para /transactions.
+// O mesmo objeto de consulta segue valendo para as páginas seguintes do cursor.
+export const fetchTransactionsPage = async (cursor, query = {}) => {
+  const { q, ...filters } = query;
+  const path = q ? "search" : "transactions";
+  const response = await axios.get(`${API}/${path}`, { params: { ...filters, q, cursor } });
+  return { transactions: response.data, cursor: nextCursor(response) };
+};
+
+const foldText = (text) => text.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").toLowerCase();
+const searchWords = (text) => foldText(text).match(/[\p{L}\p{N}_]+/gu) || [];
+
+// Mesma regra do /search: sem acentos nem maiúsculas, cada palavra digitada vale como
+// começo de palavra ("merc" encontra "Mercado") e basta uma delas casar.
+export const matchesSearch = (transaction, searchTerm) => {
+  const typed = foldText(searchTerm).split(/\s+/).filter((token) => token && !token.startsWith("-"));
+  const prefixes = searchWords(typed.join(" "));
+  if (prefixes.length === 0) return true;
+  const words = searchWords(`${transaction.description} ${transaction.category}`);
+  return prefixes.some((prefix) => words.some((word) => word.startsWith(prefix)));
+};
+
+// Converte a busca e os filtros do Dashboard nos parâmetros da API; vazio quando nada está ativo.
+// A lista mostra só transações até agora, então a data final nunca passa do momento atual.
+export const transactionQuery = (searchTerm, filters) => {
+  const query = {};
+  const term = searchTerm.trim();
+  if (term) query.q = term;
+  if (filters.type !== "all") query.type = filters.type;
+  if (filters.category !== "all") query.category = filters.category;
+  if (filters.dateFrom) query.start_date = new Date(filters.dateFrom).toISOString();
+  if (Object.keys(query).length === 0 && !filters.dateTo) return query;
+
+  let end = new Date();
+  if (filters.dateTo) {
+    const dayAfter = new Date(filters.dateTo);
+    dayAfter.setUTCDate(dayAfter.getUTCDate() + 1);
+    if (dayAfter < end) end = dayAfter;
+  }
+  query.end_date = end.toISOString();
+  return query;
+};
+
+// A Timeline mostra a janela dos próximos dias; os filtros de data só a estreitam.
+export const timelineQuery = (filters, days = 30) => {
+  let start = new Date();
+  let end = new Date(start);
+  end.setDate(end.getDate() + days);
+  if (filters.dateFrom && new Date(filters.dateFrom) > start) start = new Date(filters.dateFrom);
+  if (filters.dateTo) {
+    const dayAfter = new Date(filters.dateTo);
+    dayAfter.setUTCDate(dayAfter.getUTCDate() + 1);
+    if (dayAfter < end) end = dayAfter;
+  }
+  const query = { start_date: start.toISOString(), end_date: end.toISOString(), limit: 500 };
+  if (filters.type !== "all") query.type = filters.type;
+  if (filters.category !== "all") query.category = filters.category;
+  return query;
+};
+
+// Segue o cursor até o fim; use só com consultas limitadas por data, como a da Timeline.
+export const fetchAllPages = async (query) => {
+  let page = await fetchTransactionsPage(null, query);
+  let loaded = page.transactions;
+  while (page.cursor) {
+    page = await fetchTransactionsPage(page.cursor, query);
+    loaded = loaded.concat(page.transactions);
+  }
+  return loaded;
+};
@@ -12,7 +12,7 @@ const Comparison = () => {
 
   const fetchData = async () => {
     try {
-      const response = await axios.get(`${API}/stats/comparison`);
+      const response = await axios.get(`${API}/stats/comparison`, { params: { include_transactions: false } });
       setComparison(response.data);
     } catch (error) {
       console.error("Erro ao carregar comparação:", error);
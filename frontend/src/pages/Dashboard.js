@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { Plus, Edit3 } from "lucide-react";
 import { Button } from "@/components/ui/button";
@@ -13,14 +13,20 @@ import TimelineView from "@/components/TimelineView.js";
 import FilterBar from "@/components/FilterBar.js";
 import AlertsPanel from "@/components/AlertsPanel.js";
 import SearchBar from "@/components/SearchBar.js";
+import { fetchTransactionsPage, matchesSearch, nextCursor, transactionQuery } from "@/lib/transactions.js";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const Dashboard = () => {
   const [transactions, setTransactions] = useState([]);
-  const [filteredTransactions, setFilteredTransactions] = useState([]);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [scheduled, setScheduled] = useState([]);
+  const [filteredScheduled, setFilteredScheduled] = useState([]);
   const [weekStats, setWeekStats] = useState(null);
+  const [upcoming, setUpcoming] = useState([]);
+  const [budgetAlerts, setBudgetAlerts] = useState([]);
   const [modalOpen, setModalOpen] = useState(false);
   const [editingTransaction, setEditingTransaction] = useState(null);
   const [loading, setLoading] = useState(true);
@@ -32,6 +38,9 @@ const Dashboard = () => {
     dateFrom: "",
     dateTo: "",
   });
+  const queryRef = useRef({});
+  const requestRef = useRef(0);
+  const searchTimeoutRef = useRef(null);
 
   useEffect(() => {
     requestNotificationPermission();
@@ -43,15 +52,28 @@ const Dashboard = () => {
     }
   };
 
+  const isFiltering = () => Object.keys(queryRef.current).length > 0;
+
+  // Ignora respostas que chegam depois de uma consulta mais nova
+  const showPage = (request, page) => {
+    if (request !== requestRef.current) return;
+    setTransactions(page.transactions);
+    setCursor(page.cursor);
+  };
+
   const fetchData = async () => {
+    const request = ++requestRef.current;
     try {
-      const [transRes, statsRes] = await Promise.all([
-        axios.get(`${API}/transactions`),
-        axios.get(`${API}/stats/week`),
+      // Com busca ou filtros ativos, a lista vem do servidor e cobre todo o histórico
+      const [response, page] = await Promise.all([
+        axios.get(`${API}/dashboard`),
+        isFiltering() ? fetchTransactionsPage(null, queryRef.current) : null,
       ]);
-      setTransactions(transRes.data);
-      setFilteredTransactions(transRes.data);
-      setWeekStats(statsRes.data);
+      showPage(request, page || { transactions: response.data.transactions, cursor: nextCursor(response) });
+      setScheduled(response.data.scheduled);
+      setWeekStats(response.data.week);
+      setUpcoming(response.data.upcoming);
+      setBudgetAlerts(response.data.budget_alerts);
     } catch (error) {
       console.error("Erro ao carregar dados:", error);
       toast.error("Erro ao carregar dados");
@@ -60,23 +82,97 @@ const Dashboard = () => {
     }
   };
 
+  const fetchFiltered = async () => {
+    if (!isFiltering()) {
+      fetchData();
+      return;
+    }
+    const request = ++requestRef.current;
+    try {
+      showPage(request, await fetchTransactionsPage(null, queryRef.current));
+    } catch (error) {
+      console.error("Erro ao buscar transações:", error);
+      toast.error("Erro ao buscar transações");
+    }
+  };
+
   useEffect(() => {
     fetchData();
   }, []);
 
   useEffect(() => {
-    applyFiltersAndSearch();
-  }, [filters, searchTerm, transactions]);
+    const query = transactionQuery(searchTerm, filters);
+    if (JSON.stringify(query) === JSON.stringify(queryRef.current)) return;
+    queryRef.current = query;
+    clearTimeout(searchTimeoutRef.current);
+    searchTimeoutRef.current = setTimeout(fetchFiltered, 300);
+  }, [filters, searchTerm]);
+
+  useEffect(() => () => clearTimeout(searchTimeoutRef.current), []);
+
+  const loadMore = async () => {
+    setLoadingMore(true);
+    const request = requestRef.current;
+    try {
+      const page = await fetchTransactionsPage(cursor, queryRef.current);
+      if (request !== requestRef.current) return;
+      setTransactions(current => current.concat(page.transactions));
+      setCursor(page.cursor);
+    } catch (error) {
+      console.error("Erro ao carregar transações:", error);
+      toast.error("Erro ao carregar transações");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // O EventSource não envia cabeçalhos, então a URL leva um token curto que só abre o stream.
+  // Ele expira logo, por isso cada reconexão pede um novo em vez de repetir a mesma URL.
+  useEffect(() => {
+    if (!localStorage.getItem("token") || typeof EventSource === "undefined") return;
+    let events = null;
+    let timeout = null;
+    let reconnect = null;
+    let closed = false;
+    const refresh = () => {
+      clearTimeout(timeout);
+      timeout = setTimeout(fetchData, 300);
+    };
+    const connect = async () => {
+      try {
+        const response = await axios.post(`${API}/events/token`);
+        if (closed) return;
+        events = new EventSource(`${API}/events?token=${encodeURIComponent(response.data.token)}`);
+        events.addEventListener("change", refresh);
+        events.addEventListener("overflow", refresh);
+        events.onerror = () => {
+          events.close();
+          if (!closed) reconnect = setTimeout(connect, 5000);
+        };
+      } catch (error) {
+        console.error("Erro ao abrir o stream de eventos:", error);
+      }
+    };
+    connect();
+    return () => {
+      closed = true;
+      clearTimeout(timeout);
+      clearTimeout(reconnect);
+      if (events) events.close();
+    };
+  }, []);
+
+  // As transações programadas são poucas e já vêm inteiras do dashboard, então são filtradas aqui mesmo
+  useEffect(() => {
+    setFilteredScheduled(filterScheduled(scheduled));
+  }, [filters, searchTerm, scheduled]);
 
-  const applyFiltersAndSearch = () => {
-    let filtered = [...transactions];
+  const filterScheduled = (list) => {
+    let filtered = [...list];
 
     // Aplicar busca por texto
-    if (searchTerm) {
-      filtered = filtered.filter(t =>
-        t.description.toLowerCase().includes(searchTerm.toLowerCase()) ||
-        t.category.toLowerCase().includes(searchTerm.toLowerCase())
-      );
+    if (searchTerm.trim()) {
+      filtered = filtered.filter(t => matchesSearch(t, searchTerm));
     }
 
     // Aplicar filtros
@@ -96,7 +192,7 @@ const Dashboard = () => {
       filtered = filtered.filter(t => new Date(t.date) <= new Date(filters.dateTo));
     }
 
-    setFilteredTransactions(filtered);
+    return filtered;
   };
 
   const handleSaveTransaction = async (data) => {
@@ -138,7 +234,7 @@ const Dashboard = () => {
 
   const handleBulkDelete = async (ids) => {
     try {
-      await Promise.all(ids.map(id => axios.delete(`${API}/transactions/${id}`)));
+      await axios.post(`${API}/transactions/batch-delete`, { transaction_ids: ids });
       toast.success(`${ids.length} transações deletadas com sucesso!`);
       fetchData();
     } catch (error) {
@@ -152,9 +248,7 @@ const Dashboard = () => {
     setModalOpen(true);
   };
 
-  const now = new Date();
-  const currentFilteredTransactions = filteredTransactions.filter(t => new Date(t.date) <= now);
-  const recentTransactions = currentFilteredTransactions.slice(0, 5);
+  const recentTransactions = transactions.slice(0, 5);
 
   if (loading) {
     return (
@@ -199,9 +293,9 @@ const Dashboard = () => {
         </div>
       </div>
 
-      <TimelineView transactions={filteredTransactions} />
+      <TimelineView transactions={filteredScheduled} />
 
-      <UpcomingTransactions transactions={filteredTransactions} />
+      <UpcomingTransactions transactions={filteredScheduled} />
 
       <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
         <div className="lg:col-span-2">
@@ -212,7 +306,7 @@ const Dashboard = () => {
         </div>
       </div>
 
-      <PeriodChart transactions={currentFilteredTransactions} />
+      <PeriodChart transactions={transactions} />
 
       <div className="bg-card rounded-3xl border border-border/50 p-6 shadow-sm">
         <h3 className="text-2xl font-display font-bold mb-6">
@@ -225,6 +319,19 @@ const Dashboard = () => {
           onBulkDelete={handleBulkDelete}
           showBulkActions={bulkEditMode}
         />
+        {cursor && (
+          <div className="flex justify-center mt-6">
+            <Button
+              variant="outline"
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="rounded-full"
+              data-testid="load-more-transactions"
+            >
+              {loadingMore ? "Carregando..." : "Carregar transações anteriores"}
+            </Button>
+          </div>
+        )}
       </div>
 
       <TransactionModal
@@ -237,7 +344,7 @@ const Dashboard = () => {
         transaction={editingTransaction}
       />
 
-      <AlertsPanel />
+      <AlertsPanel upcoming={upcoming} budgetAlerts={budgetAlerts} />
     </div>
   );
 };
@@ -75,12 +75,7 @@ const MonthView = () => {
     );
   }
 
-  const now = new Date();
-  const currentTransactions = stats?.transactions.filter(t => new Date(t.date) <= now) || [];
-  const currentStats = {
-    ...stats,
-    transactions: currentTransactions
-  };
+  const currentTransactions = stats?.transactions || [];
 
   return (
     <div className="space-y-8 animate-in fade-in duration-500">
@@ -102,9 +97,9 @@ const MonthView = () => {
         </Button>
       </div>
 
-      <UpcomingTransactions transactions={stats?.transactions || []} />
+      <UpcomingTransactions transactions={stats?.scheduled || []} />
 
-      {stats && <PeriodStats stats={currentStats} />}
+      {stats && <PeriodStats stats={stats} />}
 
       <div className="bg-card rounded-3xl border border-border/50 p-6 shadow-sm">
         <h3 className="text-2xl font-display font-bold mb-6">Todas as Transações</h3>
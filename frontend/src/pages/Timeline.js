@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState, useEffect, useRef } from "react";
 import axios from "axios";
 import { Plus } from "lucide-react";
 import { Button } from "@/components/ui/button";
@@ -6,13 +6,13 @@ import { toast } from "sonner";
 import TimelineView from "@/components/TimelineView.js";
 import TransactionModal from "@/components/TransactionModal.js";
 import FilterBar from "@/components/FilterBar.js";
+import { fetchAllPages, timelineQuery } from "@/lib/transactions.js";
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
 
 const Timeline = () => {
   const [transactions, setTransactions] = useState([]);
-  const [filteredTransactions, setFilteredTransactions] = useState([]);
   const [modalOpen, setModalOpen] = useState(false);
   const [loading, setLoading] = useState(true);
   const [filters, setFilters] = useState({
@@ -22,11 +22,15 @@ const Timeline = () => {
     dateTo: "",
   });
 
+  const requestRef = useRef(0);
+
+  // Os filtros vão para a API e a janela inteira é carregada, então nada fica de fora.
   const fetchData = async () => {
+    const request = ++requestRef.current;
     try {
-      const response = await axios.get(`${API}/transactions`);
-      setTransactions(response.data);
-      setFilteredTransactions(response.data);
+      const loaded = await fetchAllPages(timelineQuery(filters));
+      if (request !== requestRef.current) return;
+      setTransactions(loaded);
     } catch (error) {
       console.error("Erro ao carregar dados:", error);
       toast.error("Erro ao carregar dados");
@@ -37,33 +41,7 @@ const Timeline = () => {
 
   useEffect(() => {
     fetchData();
-  }, []);
-
-  useEffect(() => {
-    applyFilters();
-  }, [filters, transactions]);
-
-  const applyFilters = () => {
-    let filtered = [...transactions];
-
-    if (filters.type !== "all") {
-      filtered = filtered.filter(t => t.type === filters.type);
-    }
-
-    if (filters.category !== "all") {
-      filtered = filtered.filter(t => t.category === filters.category);
-    }
-
-    if (filters.dateFrom) {
-      filtered = filtered.filter(t => new Date(t.date) >= new Date(filters.dateFrom));
-    }
-
-    if (filters.dateTo) {
-      filtered = filtered.filter(t => new Date(t.date) <= new Date(filters.dateTo));
-    }
-
-    setFilteredTransactions(filtered);
-  };
+  }, [filters]);
 
   const handleSaveTransaction = async (data) => {
     try {
@@ -109,7 +87,7 @@ const Timeline = () => {
         </div>
       </div>
 
-      <TimelineView transactions={filteredTransactions} />
+      <TimelineView transactions={transactions} />
 
       <TransactionModal
         open={modalOpen}
@@ -0,0 +1,44 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "meu_fluxo_test")
+os.environ.setdefault("RECURRING_INTERVAL_SECONDS", "0")
+os.environ.setdefault("REMINDER_INTERVAL_SECONDS", "0")
+os.environ.setdefault("TIPS_PRECOMPUTE_HOUR", "-1")
+
+import server  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    database = mongomock_motor.AsyncMongoMockClient(tz_aware=True)["meu_fluxo_test"]
+    monkeypatch.setattr(server, "db", database)
+    return database
+
+
+@pytest.fixture
+async def user(db):
+    user = server.User(email="teste@meufluxo.dev", name="Teste", password_hash="x")
+    # mongomock's find_one_and_update returns None when the projected field does not exist yet
+    await db.users.insert_one({**user.model_dump(), "data_version": 0})
+    return user
+
+
+@pytest.fixture
+async def client(db, user):
+    import httpx
+    transport = httpx.ASGITransport(app=server.app)
+    headers = {"Authorization": f"Bearer {server.create_token(user.id)}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        yield client
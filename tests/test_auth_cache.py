@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+
+import server
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(server.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_lru_cache_expires_and_evicts(clock):
+    cache = server.LRUCache(max_entries=2, ttl_seconds=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=60)
+    clock[0] += 5
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    # "a" was read last, so "b" is the least recently used
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    clock[0] += 6
+    # a shorter per-entry ttl wins, a longer one is capped at the cache ttl
+    assert (cache.get("a"), cache.get("c")) == (None, 3)
+    cache.delete("c")
+    cache.delete("ausente")
+    assert cache.get("c") is None and not cache.entries
+
+
+def token(**payload):
+    return jwt.encode(payload, server.JWT_SECRET, algorithm=server.JWT_ALGORITHM)
+
+
+def test_token_cache_entry_ends_at_the_token_expiry(clock, monkeypatch):
+    monkeypatch.setattr(server, "token_cache", server.LRUCache(10, server.AUTH_CACHE_TTL_SECONDS))
+    short = token(user_id="u1", exp=datetime.now(timezone.utc) + timedelta(seconds=30))
+    assert server.decode_user_token(short) == "u1"
+    expires_at = server.token_cache.entries[short][1]
+    assert clock[0] + 25 < expires_at <= clock[0] + 30
+    clock[0] += 31
+    assert server.token_cache.get(short) is None
+
+
+@pytest.mark.anyio
+async def test_token_without_exp_is_rejected(client):
+    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {token(user_id='u1')}"})
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token inválido"
+
+
+@pytest.mark.anyio
+async def test_profile_cache_is_dropped_on_user_writes_and_after_ttl(client, user, db, clock, monkeypatch):
+    monkeypatch.setattr(server, "user_cache", server.LRUCache(10, server.AUTH_CACHE_TTL_SECONDS))
+    monkeypatch.setattr(server.password_hasher, "rounds", 4)
+    await db.users.update_one({"id": user.id}, {"$set": {"password_hash": server.bcrypt_hash("segredo", 4)}})
+    assert (await client.get("/api/auth/me")).json()["name"] == "Teste"
+
+    await db.users.update_one({"id": user.id}, {"$set": {"name": "Renomeado"}})
+    assert (await client.get("/api/auth/me")).json()["name"] == "Teste"
+    login = await client.post("/api/auth/login", json={"email": user.email, "password": "segredo"})
+    assert login.json()["user"]["name"] == "Renomeado"
+    assert server.user_cache.get(user.id) is None
+    assert (await client.get("/api/auth/me")).json()["name"] == "Renomeado"
+
+    await db.users.update_one({"id": user.id}, {"$set": {"name": "Ativo"}})
+    await server.record_activity(user.id)
+    assert (await client.get("/api/auth/me")).json()["name"] == "Ativo"
+
+    await db.users.update_one({"id": user.id}, {"$set": {"name": "De novo"}})
+    clock[0] += server.AUTH_CACHE_TTL_SECONDS + 1
+    assert (await client.get("/api/auth/me")).json()["name"] == "De novo"
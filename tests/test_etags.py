@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+class FrozenClock(datetime):
+    current = datetime(2026, 10, 16, 10, 59, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+async def create_transaction(client):
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": "2026-10-05T00:00:00+00:00",
+        "type": "saida",
+        "category": "Alimentação",
+        "description": "Mercado"
+    })
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_matching_etag_answers_304_until_a_write(client):
+    await create_transaction(client)
+    first = await client.get("/api/transactions")
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    cached = await client.get("/api/transactions", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag
+    assert cached.content == b""
+    # the strong form and lists of candidates match too
+    listed = await client.get("/api/transactions", headers={"If-None-Match": f'"other", {etag.removeprefix("W/")}'})
+    assert listed.status_code == 304
+
+    await create_transaction(client)
+    changed = await client.get("/api/transactions", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/api/dashboard", "/api/budgets/status"])
+async def test_reads_bounded_by_now_renew_their_etag_every_hour(client, monkeypatch, path):
+    monkeypatch.setattr(server, "datetime", FrozenClock)
+    bounded = await client.get(path)
+    transactions = await client.get("/api/transactions")
+    assert (await client.get(path, headers={"If-None-Match": bounded.headers["ETag"]})).status_code == 304
+
+    monkeypatch.setattr(FrozenClock, "current", datetime(2026, 10, 16, 11, 0, tzinfo=timezone.utc))
+    renewed = await client.get(path, headers={"If-None-Match": bounded.headers["ETag"]})
+    assert renewed.status_code == 200
+    assert renewed.headers["ETag"] != bounded.headers["ETag"]
+    # lists that don't depend on the clock keep their ETag within the day
+    assert (await client.get("/api/transactions", headers={"If-None-Match": transactions.headers["ETag"]})).status_code == 304
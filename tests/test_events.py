@@ -0,0 +1,110 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+import pytest
+
+import server
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    hub = server.EventHub(max_queue=2)
+    monkeypatch.setattr(server, "event_hub", hub)
+    return hub
+
+
+def next_message(stream):
+    return asyncio.wait_for(stream.__anext__(), 1)
+
+
+def change_data(message):
+    lines = dict(line.split(b": ", 1) for line in message.strip().split(b"\n"))
+    assert lines[b"event"] == b"change"
+    return int(lines[b"id"]), json.loads(lines[b"data"])
+
+
+@pytest.mark.anyio
+async def test_writes_are_pushed_to_the_users_stream(client, user, hub):
+    stream = server.event_stream(user.id)
+    other = server.event_stream("outro-usuario")
+    assert await next_message(stream) == b"retry: 5000\n\n"
+    assert await next_message(other) == b"retry: 5000\n\n"
+    assert hub.metrics.connections == 2
+
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": "2026-10-05T00:00:00+00:00",
+        "type": "saida",
+        "category": "Alimentação",
+        "description": "Mercado"
+    })
+    event_id, data = change_data(await next_message(stream))
+    assert data == {"token": event_id, "entity": "transactions", "upserted": [response.json()["id"]], "deleted": []}
+    assert event_id == await server.get_data_version(user.id)
+    assert (hub.metrics.published, hub.metrics.delivered) == (1, 1)
+
+    hub.close()
+    with pytest.raises(StopAsyncIteration):
+        await next_message(stream)
+    await other.aclose()
+    assert hub.metrics.connections == 0
+
+
+@pytest.mark.anyio
+async def test_slow_subscriber_gets_overflow_and_is_dropped(hub):
+    stream = server.event_stream("u1")
+    await next_message(stream)
+    for token in range(1, 4):
+        hub.publish("u1", token, {"entity": "transactions", "upserted": [], "deleted": []})
+    assert await next_message(stream) == server.EVENT_OVERFLOW
+    with pytest.raises(StopAsyncIteration):
+        await next_message(stream)
+    assert (hub.metrics.delivered, hub.metrics.dropped, hub.metrics.connections) == (2, 1, 0)
+
+
+@pytest.mark.anyio
+async def test_idle_stream_sends_heartbeats(hub, monkeypatch):
+    monkeypatch.setattr(server, "EVENTS_HEARTBEAT_SECONDS", 0.01)
+    stream = server.event_stream("u1")
+    await next_message(stream)
+    assert await next_message(stream) == b": ping\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.anyio
+async def test_stream_needs_a_token(db):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as anonymous:
+        assert (await anonymous.get("/api/events")).status_code == 401
+        assert (await anonymous.get("/api/events", params={"token": "invalido"})).status_code == 401
+
+
+@pytest.mark.anyio
+async def test_query_token_must_be_a_stream_token(client, user):
+    response = await client.post("/api/events/token")
+    assert response.json()["expires_in"] == server.EVENTS_TOKEN_SECONDS
+    stream_token = response.json()["token"]
+    assert server.decode_stream_token(stream_token) == user.id
+    # the stream token opens nothing else
+    assert (await client.get("/api/auth/me", headers={"Authorization": f"Bearer {stream_token}"})).status_code == 401
+
+    expired = jwt.encode(
+        {"user_id": user.id, "purpose": "events", "exp": datetime.now(timezone.utc) - timedelta(seconds=1)},
+        server.JWT_SECRET, algorithm=server.JWT_ALGORITHM
+    )
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as anonymous:
+        # the long-lived session token is not accepted in the URL
+        assert (await anonymous.get("/api/events", params={"token": server.create_token(user.id)})).status_code == 401
+        assert (await anonymous.get("/api/events", params={"token": expired})).json()["detail"] == "Token expirado"
+
+
+@pytest.mark.anyio
+async def test_event_metrics_need_the_metrics_token(client, hub, monkeypatch):
+    assert (await client.get("/api/events/metrics")).status_code == 404
+    monkeypatch.setattr(server, "METRICS_TOKEN", "operador")
+    response = await client.get("/api/events/metrics", headers={"X-Metrics-Token": "operador"})
+    assert response.json() == {"connections": 0, "published": 0, "delivered": 0, "dropped": 0}
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+async def transactions(db, user, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_BATCH_SIZE", 2)
+    start = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    docs = [
+        server.Transaction(
+            user_id=user.id, amount=10 + i, date=start + timedelta(days=i), type="saida" if i % 2 else "entrada",
+            category="Outros", description=f"Compra {i}"
+        ).model_dump()
+        for i in range(5)
+    ]
+    await db.transactions.insert_many([dict(doc) for doc in docs])
+    return docs
+
+
+@pytest.mark.anyio
+async def test_csv_export_streams_one_chunk_per_batch(user, transactions):
+    chunks = [chunk async for chunk in server.export_csv_chunks({"user_id": user.id})]
+    # header, then batches of EXPORT_BATCH_SIZE rows
+    assert len(chunks) == 4
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows[0] == ["Data", "Tipo", "Categoria", "Descrição", "Valor"]
+    assert rows[1:3] == [
+        ["05/10/2026", "Entrada", "Outros", "Compra 4", "R$ 14.00"],
+        ["04/10/2026", "Saída", "Outros", "Compra 3", "R$ 13.00"],
+    ]
+    assert len(rows) == 6
+
+
+@pytest.mark.anyio
+async def test_ndjson_export_filters_by_date_range(client, transactions):
+    response = await client.get("/api/export", params={
+        "format": "ndjson",
+        "start_date": "2026-10-02T00:00:00Z",
+        "end_date": "2026-10-04T00:00:00Z"
+    })
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == "attachment; filename=transacoes.ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["description"], line["date"]) for line in lines] == [
+        ("Compra 2", "2026-10-03T00:00:00+00:00"),
+        ("Compra 1", "2026-10-02T00:00:00+00:00"),
+    ]
+    assert set(lines[0]) == set(server.EXPORT_FIELDS)
+
+
+@pytest.mark.anyio
+async def test_parquet_export_round_trips(client, transactions):
+    pq = pytest.importorskip("pyarrow.parquet")
+    response = await client.get("/api/export", params={"format": "parquet"})
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 5
+    assert table.column("description").to_pylist() == [f"Compra {i}" for i in range(4, -1, -1)]
+    assert table.column("amount").to_pylist() == [14.0, 13.0, 12.0, 11.0, 10.0]
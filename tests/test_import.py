@@ -0,0 +1,99 @@
+import pytest
+
+import server
+
+
+@pytest.fixture
+async def import_index(db):
+    await db.transactions.create_index(
+        [("user_id", 1), ("import_hash", 1)],
+        unique=True,
+        partialFilterExpression={"import_hash": {"$exists": True}}
+    )
+
+
+async def upload(client, filename, content):
+    response = await client.post("/api/transactions/import", files={"file": (filename, content)})
+    assert response.status_code == 200
+    return response.json()
+
+
+async def imported(user_id):
+    transactions = await server.db.transactions.find({"user_id": user_id}, {"_id": 0}).sort("description", 1).to_list(None)
+    return [(t["date"].date().isoformat(), t["amount"], t["type"], t["category"], t["description"]) for t in transactions]
+
+
+STATEMENT = (
+    "Data;Tipo;Categoria;Descrição;Valor\n"
+    "05/10/2026;saída;Transporte;Uber;R$ 15,00\n"
+    "05/10/2026;saída;Transporte;Uber;R$ 15,00\n"
+    "06/10/2026;entrada;Salário;Salário;1.234,56\n"
+).encode("utf-8")
+
+
+@pytest.mark.anyio
+async def test_csv_import_keeps_repeated_rows_and_dedups_on_reimport(client, user, import_index):
+    result = await upload(client, "extrato.csv", STATEMENT)
+    assert (result["total_rows"], result["imported"], result["duplicates"], result["failed"]) == (3, 3, 0, 0)
+    assert await imported(user.id) == [
+        ("2026-10-06", 1234.56, "entrada", "Salário", "Salário"),
+        ("2026-10-05", 15.0, "saida", "Transporte", "Uber"),
+        ("2026-10-05", 15.0, "saida", "Transporte", "Uber"),
+    ]
+
+    result = await upload(client, "extrato.csv", STATEMENT)
+    assert (result["imported"], result["duplicates"]) == (0, 3)
+
+    # a later statement with a third identical ride adds only that one
+    result = await upload(client, "extrato.csv", STATEMENT + "05/10/2026;saída;Transporte;Uber;R$ 15,00\n".encode("utf-8"))
+    assert (result["imported"], result["duplicates"]) == (1, 3)
+
+
+@pytest.mark.anyio
+async def test_csv_import_falls_back_to_latin1(client, user, import_index):
+    content = "data,valor,descricao\n2026-10-05,-12.50,Padaria São João\n".encode("latin-1")
+    result = await upload(client, "extrato.csv", content)
+    assert (result["imported"], result["failed"]) == (1, 0)
+    assert await imported(user.id) == [("2026-10-05", 12.5, "saida", "Outros", "Padaria São João")]
+
+
+@pytest.mark.anyio
+async def test_csv_import_reports_errors_per_row(client, user, import_index):
+    content = (
+        "data;valor;descricao\n"
+        "05/10/2026;10,00;Mercado\n"
+        "31/02/2026;10,00;Data inexistente\n"
+        "06/10/2026;;Sem valor\n"
+        "07/10/2026;dez reais;Valor inválido\n"
+        "08/10/2026;-5,00;Café\n"
+    ).encode("utf-8")
+    result = await upload(client, "extrato.csv", content)
+    assert (result["total_rows"], result["imported"], result["failed"]) == (5, 2, 3)
+    assert [(error["row"], error["error"]) for error in result["errors"]] == [
+        (3, "Data inválida: 31/02/2026"),
+        (4, "Data e valor são obrigatórios"),
+        (5, "Valor inválido: dez reais"),
+    ]
+
+
+OFX = b"""OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20261005120000[-3:BRT]<TRNAMT>-15.00<FITID>A1<MEMO>Uber</STMTTRN>
+<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20261005120000[-3:BRT]<TRNAMT>-15.00<FITID>A2<MEMO>Uber</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20261006<TRNAMT>100.00<FITID>A3<NAME>Pix recebido</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+@pytest.mark.anyio
+async def test_ofx_import_dedups_on_fitid(client, user, import_index):
+    result = await upload(client, "extrato.ofx", OFX)
+    assert (result["total_rows"], result["imported"], result["duplicates"]) == (3, 3, 0)
+    assert await imported(user.id) == [
+        ("2026-10-06", 100.0, "entrada", "Outros", "Pix recebido"),
+        ("2026-10-05", 15.0, "saida", "Outros", "Uber"),
+        ("2026-10-05", 15.0, "saida", "Outros", "Uber"),
+    ]
+
+    result = await upload(client, "extrato.ofx", OFX)
+    assert (result["imported"], result["duplicates"]) == (0, 3)
@@ -0,0 +1,35 @@
+import logging
+
+import pytest
+
+import server
+
+
+@pytest.mark.anyio
+async def test_ensure_indexes_creates_every_index_once(db, caplog):
+    with caplog.at_level(logging.INFO, logger="server"):
+        await server.ensure_indexes()
+    created = [record.message for record in caplog.records if record.message.startswith("Índices criados")]
+    assert len(created) == len(server.INDEXES)
+
+    caplog.clear()
+    with caplog.at_level(logging.INFO, logger="server"):
+        await server.ensure_indexes()
+    assert not [record for record in caplog.records if record.levelno >= logging.INFO]
+
+    for collection_name, indexes in server.INDEXES.items():
+        existing = await db[collection_name].index_information()
+        assert set(existing) == {"_id_", *(index.document["name"] for index in indexes)}
+        for index in indexes:
+            stored = existing[index.document["name"]]
+            assert list(stored["key"]) == list(index.document["key"].items())
+            # mongomock keeps unique and TTL options but drops partialFilterExpression
+            for option in ("unique", "expireAfterSeconds"):
+                assert stored.get(option) == index.document.get(option)
+
+
+@pytest.mark.anyio
+async def test_keyset_pagination_index_matches_the_sort(db):
+    await server.ensure_indexes()
+    existing = await db.transactions.index_information()
+    assert list(existing["user_id_date_order"]["key"]) == [("user_id", 1), *server.TRANSACTION_SORT]
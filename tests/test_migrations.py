@@ -0,0 +1,30 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+@pytest.mark.anyio
+async def test_string_dates_become_bson_dates_once(db):
+    already = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    await db.transactions.insert_many([
+        {"id": "t1", "date": "2026-10-05T12:00:00+00:00", "created_at": "2026-10-05T12:30:00+00:00"},
+        {"id": "t2", "date": "2026-10-06T09:00:00-03:00", "created_at": "2026-10-06T12:00:00"},
+        {"id": "t3", "date": already, "created_at": already},
+    ])
+
+    assert await server.migrate_string_dates("transactions", "date", batch_size=1) == 2
+    assert await server.migrate_string_dates("transactions", "created_at", batch_size=1) == 2
+    assert await db.transactions.count_documents({"$or": [{"date": {"$type": "string"}}, {"created_at": {"$type": "string"}}]}) == 0
+
+    migrated = {t["id"]: t async for t in db.transactions.find({}, {"_id": 0})}
+    assert migrated["t1"]["date"] == datetime(2026, 10, 5, 12, tzinfo=timezone.utc)
+    # offsets are converted to UTC, and naive strings are read as UTC
+    assert migrated["t2"]["date"] == datetime(2026, 10, 6, 12, tzinfo=timezone.utc)
+    assert migrated["t2"]["created_at"] == datetime(2026, 10, 6, 12, tzinfo=timezone.utc)
+    assert migrated["t3"]["date"] == already
+
+    assert await server.migrate_string_dates("transactions", "date") == 0
+    assert await server.migrate_string_dates("transactions", "created_at") == 0
+    assert {t["id"]: t async for t in db.transactions.find({}, {"_id": 0})} == migrated
@@ -0,0 +1,96 @@
+import pytest
+
+import server
+from server import ORDER_STEP, increasing_positions, sparse_order
+
+
+def is_strictly_increasing(values):
+    return all(a < b for a, b in zip(values, values[1:]))
+
+
+def test_increasing_positions_keeps_longest_run():
+    assert increasing_positions([]) == set()
+    assert increasing_positions([0, 1, 2, 3]) == {0, 1, 2, 3}
+    kept = increasing_positions([10, 50, 20, 30, 40])
+    assert kept == {0, 2, 3, 4}
+
+
+def test_sparse_order_leaves_sorted_input_untouched():
+    assert sparse_order([0, 1024, 2048]) == [0, 1024, 2048]
+
+
+def test_sparse_order_moves_only_out_of_place_items():
+    current = [0, 1024, 2048, 3072, 4096]
+    moved = [current[4]] + current[:4]
+    order = sparse_order(moved)
+    assert is_strictly_increasing(order)
+    assert sum(1 for old, new in zip(moved, order) if old != new) == 1
+
+
+def test_sparse_order_handles_ties_and_edges():
+    order = sparse_order([0, 0, 0])
+    assert is_strictly_increasing(order)
+    order = sparse_order([2048, 0, 1024])
+    assert is_strictly_increasing(order)
+    assert order[1:] == [0, 1024]
+
+
+def test_sparse_order_places_before_first_kept_item():
+    assert sparse_order([5, 0, 1]) == [-ORDER_STEP, 0, 1]
+
+
+def test_sparse_order_renumbers_when_gap_is_exhausted():
+    assert sparse_order([0, 1, 3, 2]) == [0, ORDER_STEP, 2 * ORDER_STEP, 3 * ORDER_STEP]
+
+
+async def create_same_day(client, descriptions):
+    ids = []
+    for description in descriptions:
+        response = await client.post("/api/transactions", json={
+            "amount": 10,
+            "date": "2026-10-05T12:00:00+00:00",
+            "type": "saida",
+            "category": "Alimentação",
+            "description": description
+        })
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def listed_ids(client):
+    return [t["id"] for t in (await client.get("/api/transactions")).json()]
+
+
+@pytest.mark.anyio
+async def test_reorder_sets_the_order_within_a_day(client, user):
+    first, second, third = await create_same_day(client, ["Padaria", "Mercado", "Farmácia"])
+    version = await server.get_data_version(user.id)
+
+    response = await client.post("/api/transactions/reorder", json={"transaction_ids": [third, first, second]})
+    assert response.status_code == 200
+    # new rows all start at order_index 0, so only one of the three can keep its value
+    assert response.json()["updated"] == 2
+    assert await listed_ids(client) == [third, first, second]
+    # one change-log entry per moved row
+    assert await server.get_data_version(user.id) == version + 2
+
+    # already in that order: nothing is written
+    response = await client.post("/api/transactions/reorder", json={"transaction_ids": [third, first, second]})
+    assert response.json()["updated"] == 0
+    assert await server.get_data_version(user.id) == version + 2
+
+
+@pytest.mark.anyio
+async def test_reorder_ignores_other_users_transactions(client, db):
+    first, second = await create_same_day(client, ["Padaria", "Mercado"])
+    foreign = server.Transaction(
+        user_id="outro-usuario", amount=1, date="2026-10-05T12:00:00+00:00",
+        type="saida", category="Outros", description="Alheia", order_index=-5
+    )
+    await db.transactions.insert_one(foreign.model_dump())
+
+    response = await client.post("/api/transactions/reorder", json={"transaction_ids": [foreign.id, second, first]})
+    assert response.status_code == 200
+    assert response.json()["updated"] == 1
+    assert await listed_ids(client) == [second, first]
+    assert (await db.transactions.find_one({"id": foreign.id}))["order_index"] == -5
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+@pytest.mark.anyio
+async def test_lists_are_paged_by_default(client, user):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    await server.db.transactions.insert_many([
+        server.Transaction(
+            user_id=user.id, amount=1, date=start + timedelta(days=i), type="saida", category="Outros", description=f"t{i}"
+        ).model_dump()
+        for i in range(server.TRANSACTIONS_PAGE_SIZE + 1)
+    ])
+    
+    dashboard = await client.get("/api/dashboard")
+    assert len(dashboard.json()["transactions"]) == server.TRANSACTIONS_PAGE_SIZE
+    first = await client.get("/api/transactions")
+    assert [t["id"] for t in first.json()] == [t["id"] for t in dashboard.json()["transactions"]]
+    assert first.headers["X-Next-Cursor"] == dashboard.headers["X-Next-Cursor"]
+    
+    rest = await client.get("/api/transactions", params={"cursor": first.headers["X-Next-Cursor"]})
+    assert [t["description"] for t in rest.json()] == ["t0"]
+    assert "X-Next-Cursor" not in rest.headers
+    
+    response = await client.get("/api/transactions", params={"limit": server.TRANSACTIONS_MAX_PAGE_SIZE + 1})
+    assert response.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_transaction_filters_reach_past_the_first_page(client, user):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    await server.db.transactions.insert_many([
+        server.Transaction(
+            user_id=user.id, amount=1, date=start + timedelta(days=i), type="entrada" if i < 3 else "saida",
+            category="Salário" if i < 3 else "Outros", description=f"t{i}"
+        ).model_dump()
+        for i in range(20)
+    ])
+    
+    # the matching rows are the oldest ones, well past a first unfiltered page
+    params = {"category": "Salário", "type": "entrada", "limit": 2}
+    first = await client.get("/api/transactions", params=params)
+    assert [t["description"] for t in first.json()] == ["t2", "t1"]
+    rest = await client.get("/api/transactions", params={**params, "cursor": first.headers["X-Next-Cursor"]})
+    assert [t["description"] for t in rest.json()] == ["t0"]
+    
+    ranged = await client.get("/api/transactions", params={
+        "start_date": (start + timedelta(days=5)).isoformat(), "end_date": (start + timedelta(days=7)).isoformat()
+    })
+    assert [t["description"] for t in ranged.json()] == ["t6", "t5"]
@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def hasher(monkeypatch):
+    hasher = server.PasswordHasher(workers=1, max_queue=2, rounds=4)
+    monkeypatch.setattr(server, "password_hasher", hasher)
+    yield hasher
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_bcrypt_runs_in_the_dedicated_executor(hasher, monkeypatch):
+    threads = []
+    bcrypt_verify = server.bcrypt_verify
+
+    def verify(password, hashed):
+        threads.append(threading.current_thread().name)
+        return bcrypt_verify(password, hashed)
+
+    monkeypatch.setattr(server, "bcrypt_verify", verify)
+    hashed = await server.hash_password("segredo")
+    assert server.password_rounds(hashed) == 4
+    assert await server.verify_password("segredo", hashed)
+    assert not await server.verify_password("errado", hashed)
+    assert len(threads) == 2 and all(name.startswith("bcrypt") for name in threads)
+    assert (hasher.metrics.completed, hasher.metrics.pending) == (3, 0)
+
+
+@pytest.mark.anyio
+async def test_full_queue_answers_503(hasher, client):
+    hasher.metrics.pending = hasher.max_queue
+    response = await client.post("/api/auth/login", json={"email": "teste@meufluxo.dev", "password": "segredo"})
+    assert response.status_code == 503
+    assert hasher.metrics.rejected == 1
+
+
+@pytest.mark.anyio
+async def test_login_upgrades_the_hash_cost(hasher, client, user, db):
+    await db.users.update_one({"id": user.id}, {"$set": {"password_hash": server.bcrypt_hash("segredo", 5)}})
+    credentials = {"email": user.email, "password": "segredo"}
+
+    assert (await client.post("/api/auth/login", json=credentials)).status_code == 200
+    stored = (await db.users.find_one({"id": user.id}))["password_hash"]
+    assert server.password_rounds(stored) == 4
+    assert server.bcrypt_verify("segredo", stored)
+    assert hasher.metrics.upgraded == 1
+
+    assert (await client.post("/api/auth/login", json=credentials)).status_code == 200
+    assert (await db.users.find_one({"id": user.id}))["password_hash"] == stored
+    assert hasher.metrics.upgraded == 1
+
+
+@pytest.mark.anyio
+async def test_auth_metrics_need_the_metrics_token(hasher, client, monkeypatch):
+    assert (await client.get("/api/auth/metrics")).status_code == 404
+    monkeypatch.setattr(server, "METRICS_TOKEN", "operador")
+    assert (await client.get("/api/auth/metrics", headers={"X-Metrics-Token": "outro"})).status_code == 404
+    response = await client.get("/api/auth/metrics", headers={"X-Metrics-Token": "operador"})
+    assert response.status_code == 200
+    assert response.json()["rounds"] == 4
@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+class FrozenClock(datetime):
+    current = datetime(2026, 10, 16, 10, 59, tzinfo=timezone.utc)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+async def history(client, monkeypatch):
+    monkeypatch.setattr(server, "datetime", FrozenClock)
+    for hour, amount, type in ((8, 100, "entrada"), (9, 30, "saida"), (10, 20, "saida"), (12, 5, "saida")):
+        response = await client.post("/api/transactions", json={
+            "amount": amount,
+            "date": datetime(2026, 10, 16, hour, tzinfo=timezone.utc).isoformat(),
+            "type": type,
+            "category": "Salário" if type == "entrada" else "Alimentação",
+            "description": f"Lançamento das {hour}h"
+        })
+        assert response.status_code == 200
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("period", ["week", "month", "year"])
+async def test_totals_do_not_depend_on_the_transaction_list(client, history, period):
+    full = (await client.get(f"/api/stats/{period}")).json()
+    assert (full["total_income"], full["total_expense"], full["balance"]) == (100, 50, 50)
+    assert [t["amount"] for t in full["transactions"]] == [20, 30, 100]
+    assert [t["amount"] for t in full["scheduled"]] == [5]
+
+    limited = (await client.get(f"/api/stats/{period}", params={"limit": 2})).json()
+    assert (limited["total_income"], limited["total_expense"], limited["balance"]) == (100, 50, 50)
+    assert [t["amount"] for t in limited["transactions"]] == [20, 30]
+
+    totals = (await client.get(f"/api/stats/{period}", params={"include_transactions": "false"})).json()
+    assert (totals["total_income"], totals["total_expense"], totals["balance"]) == (100, 50, 50)
+    assert totals["transactions"] == [] and totals["scheduled"] == []
+
+
+@pytest.mark.anyio
+async def test_limit_must_be_positive(client, history):
+    assert (await client.get("/api/stats/week", params={"limit": 0})).status_code == 422
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from server import month_span, trend_windows
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_month_span_only_counts_whole_months():
+    assert month_span(utc(2026, 1, 1), utc(2026, 4, 1)) == 3
+    assert month_span(utc(2026, 1, 1), utc(2026, 4, 2)) is None
+    assert month_span(utc(2026, 1, 15), utc(2026, 2, 15)) is None
+
+
+def test_trend_windows_step_by_calendar_months():
+    assert trend_windows(utc(2026, 3, 1), utc(2026, 4, 1), 2) == [
+        (utc(2026, 1, 1), utc(2026, 2, 1)),
+        (utc(2026, 2, 1), utc(2026, 3, 1)),
+    ]
+    assert trend_windows(utc(2026, 3, 10), utc(2026, 3, 17), 1) == [(utc(2026, 3, 3), utc(2026, 3, 10))]
+
+
+async def create_transaction(client, date, amount, type="saida", category="Alimentação"):
+    response = await client.post("/api/transactions", json={
+        "amount": amount,
+        "date": date.isoformat(),
+        "type": type,
+        "category": category,
+        "description": "Compra"
+    })
+    assert response.status_code == 200
+
+
+@pytest.mark.anyio
+async def test_day_buckets_include_start_and_exclude_end(client):
+    await create_transaction(client, utc(2026, 9, 30, 23, 59), 1)
+    await create_transaction(client, utc(2026, 10, 1), 10)
+    await create_transaction(client, utc(2026, 10, 1, 23, 59), 5, category="Lazer")
+    await create_transaction(client, utc(2026, 10, 2), 100, type="entrada", category="Salário")
+    await create_transaction(client, utc(2026, 10, 4), 1000)
+
+    response = await client.get("/api/stats/range", params={
+        "start": "2026-10-01T00:00:00Z", "end": "2026-10-04T00:00:00Z", "group_by": "category"
+    })
+    assert response.status_code == 200
+    stats = response.json()
+    assert [(b["key"], b["income"], b["expense"], b["count"]) for b in stats["series"]] == [
+        ("2026-10-01", 0, 15, 2),
+        ("2026-10-02", 100, 0, 1),
+        ("2026-10-03", 0, 0, 0),
+    ]
+    assert [(g["key"], g["expense"]) for g in stats["series"][0]["groups"]] == [("Alimentação", 10), ("Lazer", 5)]
+    assert (stats["total_income"], stats["total_expense"], stats["balance"]) == (100, 15, 85)
+
+
+@pytest.mark.anyio
+async def test_month_trend_reads_rollups(client, monkeypatch):
+    for month, amount in ((8, 30), (9, 20), (10, 10)):
+        await create_transaction(client, utc(2026, month, 15), amount)
+    rollup_reads = []
+    get_rollups = server.get_rollups
+
+    async def spy(user_id, start_date, end_date=None):
+        rollup_reads.append((start_date, end_date))
+        return await get_rollups(user_id, start_date, end_date)
+
+    monkeypatch.setattr(server, "get_rollups", spy)
+    response = await client.get("/api/stats/range", params={
+        "start": "2026-10-01T00:00:00Z", "end": "2026-11-01T00:00:00Z", "granularity": "month", "periods": 2
+    })
+    stats = response.json()
+    assert [(b["key"], b["expense"]) for b in stats["series"]] == [("2026-10", 10)]
+    assert [(t["start"][:10], t["end"][:10], t["expense"]) for t in stats["trend"]] == [
+        ("2026-08-01", "2026-09-01", 30),
+        ("2026-09-01", "2026-10-01", 20),
+        ("2026-10-01", "2026-11-01", 10),
+    ]
+    assert sorted(rollup_reads) == [(utc(2026, 8, 1), utc(2026, 9, 1)), (utc(2026, 9, 1), utc(2026, 10, 1))]
+
+
+@pytest.mark.anyio
+async def test_range_rejects_empty_and_oversized_ranges(client):
+    start = utc(2026, 1, 1)
+    empty = await client.get("/api/stats/range", params={"start": start.isoformat(), "end": start.isoformat()})
+    assert empty.status_code == 400
+    end = start + timedelta(days=server.STATS_MAX_BUCKETS + 1)
+    oversized = await client.get("/api/stats/range", params={"start": start.isoformat(), "end": end.isoformat()})
+    assert oversized.status_code == 400
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+from server import recurring_occurrences
+
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def rule(**fields):
+    return {"start_date": "2026-01-31T00:00:00+00:00", "frequency": "monthly", **fields}
+
+
+def test_monthly_clamps_to_month_end():
+    occurrences = recurring_occurrences(rule(), utc(2026, 1, 1), utc(2026, 5, 1))
+    assert occurrences == [utc(2026, 1, 31), utc(2026, 2, 28), utc(2026, 3, 31), utc(2026, 4, 30)]
+
+
+def test_monthly_resumes_after_materialized_until():
+    occurrences = recurring_occurrences(rule(day_of_month=15), utc(2026, 3, 15), utc(2026, 6, 1))
+    assert occurrences == [utc(2026, 4, 15), utc(2026, 5, 15)]
+
+
+def test_yearly_on_leap_day():
+    yearly = rule(start_date="2024-02-29T00:00:00+00:00", frequency="yearly")
+    occurrences = recurring_occurrences(yearly, utc(2024, 1, 1), utc(2028, 12, 31))
+    assert occurrences == [utc(2024, 2, 29), utc(2025, 2, 28), utc(2026, 2, 28), utc(2027, 2, 28), utc(2028, 2, 29)]
+
+
+def test_weekly_weekdays_use_sunday_as_zero():
+    # 2026-10-11 is a Sunday
+    weekly = rule(start_date="2026-10-11T00:00:00+00:00", frequency="weekly", weekdays=[0, 3])
+    occurrences = recurring_occurrences(weekly, utc(2026, 10, 10), utc(2026, 10, 25))
+    assert occurrences == [utc(2026, 10, 11), utc(2026, 10, 14), utc(2026, 10, 18), utc(2026, 10, 21), utc(2026, 10, 25)]
+
+
+def test_weekly_defaults_to_start_weekday():
+    weekly = rule(start_date="2026-10-14T00:00:00+00:00", frequency="weekly")
+    occurrences = recurring_occurrences(weekly, utc(2026, 10, 1), utc(2026, 10, 31))
+    assert occurrences == [utc(2026, 10, 14), utc(2026, 10, 21), utc(2026, 10, 28)]
+
+
+def test_end_date_is_inclusive_and_caps_the_horizon():
+    daily = rule(start_date="2026-10-01T00:00:00+00:00", frequency="daily", end_date="2026-10-03T00:00:00+00:00")
+    occurrences = recurring_occurrences(daily, utc(2026, 9, 1), utc(2026, 12, 1))
+    assert occurrences == [utc(2026, 10, 1), utc(2026, 10, 2), utc(2026, 10, 3)]
+    assert recurring_occurrences(daily, utc(2026, 10, 3), utc(2026, 12, 1)) == []
+
+
+@pytest.mark.anyio
+async def test_future_occurrences_stay_out_of_period_stats(client):
+    today = server.period_start("day")
+    response = await client.post("/api/transactions", json={
+        "amount": 1000,
+        "date": today.isoformat(),
+        "type": "entrada",
+        "category": "Salário",
+        "description": "Salário",
+        "is_recurring": True,
+        "recurring_frequency": "monthly"
+    })
+    assert response.status_code == 200
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": today.isoformat(),
+        "type": "saida",
+        "category": "Alimentação",
+        "description": "Café",
+        "is_recurring": True,
+        "recurring_frequency": "daily"
+    })
+    assert response.status_code == 200
+    assert await server.db.transactions.count_documents({"date": {"$gt": today + timedelta(days=1)}}) > 0
+    
+    for period in ("week", "month", "year"):
+        stats = (await client.get(f"/api/stats/{period}")).json()
+        assert (stats["total_income"], stats["total_expense"]) == (1000, 10)
+        # the rest of the period feeds the upcoming panel, soonest first and inside the period
+        scheduled = [datetime.fromisoformat(t["date"]) for t in stats["scheduled"]]
+        assert scheduled == sorted(scheduled)
+        assert all(today < date < server.period_end(period) for date in scheduled)
+        assert len(scheduled) >= min(server.DASHBOARD_SCHEDULED_LIMIT, (server.period_end(period) - today).days - 1)
+    
+    comparison = (await client.get("/api/stats/comparison")).json()
+    assert comparison["current_period"]["total_income"] == 1000
+    
+    # a daily rule materializes more future rows than fit in a page; the list still starts at now
+    dashboard = (await client.get("/api/dashboard", params={"limit": 5})).json()
+    now = datetime.now(timezone.utc)
+    assert {t["category"] for t in dashboard["transactions"]} == {"Salário", "Alimentação"}
+    assert all(datetime.fromisoformat(t["date"]) <= now for t in dashboard["transactions"])
+    assert (dashboard["week"]["total_income"], dashboard["week"]["total_expense"]) == (1000, 10)
+    
+    # future occurrences feed the upcoming panels from their own bounded, soonest-first list
+    scheduled = [datetime.fromisoformat(t["date"]) for t in dashboard["scheduled"]]
+    assert len(scheduled) == server.DASHBOARD_SCHEDULED_LIMIT
+    assert scheduled == sorted(scheduled) and scheduled[0] > now
+
+
+@pytest.mark.anyio
+async def test_future_occurrences_stay_out_of_budget_status(client):
+    today = server.period_start("day")
+    for period in ("month", "year"):
+        response = await client.post("/api/budgets", json={"category": "Alimentação", "limit": 100, "period": period})
+        assert response.status_code == 200
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": today.isoformat(),
+        "type": "saida",
+        "category": "Alimentação",
+        "description": "Café",
+        "is_recurring": True,
+        "recurring_frequency": "daily"
+    })
+    assert response.status_code == 200
+    
+    status = (await client.get("/api/budgets/status")).json()
+    assert sorted((item["period"], item["spent"]) for item in status) == [("month", 10), ("year", 10)]
+    dashboard = (await client.get("/api/dashboard")).json()
+    assert dashboard["budget_alerts"] == []
+
+
+@pytest.mark.anyio
+async def test_moving_occurrence_onto_existing_date_conflicts(client):
+    await server.db.transactions.create_index(
+        [("recurring_id", 1), ("date", 1)],
+        unique=True,
+        partialFilterExpression={"recurring_id": {"$type": "string"}}
+    )
+    today = server.period_start("day")
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": today.isoformat(),
+        "type": "saida",
+        "category": "Alimentação",
+        "description": "Café",
+        "is_recurring": True,
+        "recurring_frequency": "daily"
+    })
+    assert response.status_code == 200
+    occurrence = await server.db.transactions.find_one({"date": today + timedelta(days=1)})
+    
+    response = await client.put(f"/api/transactions/{occurrence['id']}", json={"date": (today + timedelta(days=2)).isoformat()})
+    assert response.status_code == 409
+    assert await server.db.transactions.find_one({"id": occurrence["id"], "date": today + timedelta(days=1)})
+
+
+@pytest.mark.anyio
+async def test_watermark_never_moves_back_for_rules_starting_past_the_horizon(db, user):
+    now = utc(2026, 10, 16)
+    horizon = server.recurring_horizon(now)
+    start = horizon + timedelta(days=30)
+    future = server.RecurringTransaction(
+        user_id=user.id, amount=50, type="saida", category="Assinaturas", description="Streaming",
+        frequency="monthly", start_date=start.isoformat()
+    )
+    await db.recurring_transactions.insert_one(future.model_dump())
+
+    assert await server.materialize_recurring_transactions(now) == 0
+    stored = await db.recurring_transactions.find_one({"id": future.id})
+    watermark = server.ensure_utc(stored["materialized_until"])
+    assert horizon < watermark < start
+
+    assert await server.materialize_recurring_rule(stored, horizon) == 0
+    stored = await db.recurring_transactions.find_one({"id": future.id})
+    assert server.ensure_utc(stored["materialized_until"]) == watermark
+    assert await db.transactions.count_documents({"recurring_id": future.id}) == 0
+
+    assert await server.materialize_recurring_transactions(start + timedelta(days=1)) > 0
+    assert await db.transactions.find_one({"recurring_id": future.id, "date": start})
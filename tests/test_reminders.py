@@ -0,0 +1,69 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+class SlowTransport:
+    def __init__(self, fail: bool = False):
+        self.outbox = []
+        self.fail = fail
+    
+    async def send(self, params: dict) -> dict:
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise RuntimeError("indisponível")
+        self.outbox.append(params)
+        return {"id": "local"}
+
+
+async def insert_reminder(user, date):
+    transaction = server.Transaction(
+        user_id=user.id,
+        amount=50,
+        date=date,
+        type="saida",
+        category="Moradia",
+        description="Aluguel",
+        has_reminder=True
+    )
+    await server.db.transactions.insert_one(transaction.model_dump())
+    return transaction
+
+
+@pytest.mark.anyio
+async def test_concurrent_dispatchers_send_each_reminder_once(user, monkeypatch):
+    transport = SlowTransport()
+    monkeypatch.setattr(server, "reminder_transport", transport)
+    transaction = await insert_reminder(user, datetime.now(timezone.utc) + timedelta(hours=6))
+    
+    emails = await asyncio.gather(*(server.dispatch_due_reminders() for _ in range(3)))
+    
+    assert sum(emails) == 1
+    assert len(transport.outbox) == 1
+    stored = await server.db.transactions.find_one({"id": transaction.id})
+    assert stored["reminder_sent"] is True
+    assert "reminder_claim" not in stored
+
+
+@pytest.mark.anyio
+async def test_failed_reminder_is_released_for_the_next_run(user, monkeypatch):
+    monkeypatch.setattr(server, "REMINDER_MAX_RETRIES", 0)
+    monkeypatch.setattr(server, "reminder_transport", SlowTransport(fail=True))
+    transaction = await insert_reminder(user, datetime.now(timezone.utc) + timedelta(hours=6))
+    assert await server.dispatch_due_reminders() == 0
+    
+    transport = SlowTransport()
+    monkeypatch.setattr(server, "reminder_transport", transport)
+    assert await server.dispatch_due_reminders() == 1
+    assert (await server.db.transactions.find_one({"id": transaction.id}))["reminder_sent"] is True
+
+
+@pytest.mark.anyio
+async def test_reminder_metrics_need_the_metrics_token(client, monkeypatch):
+    assert (await client.get("/api/reminders/metrics")).status_code == 404
+    monkeypatch.setattr(server, "METRICS_TOKEN", "operador")
+    response = await client.get("/api/reminders/metrics", headers={"X-Metrics-Token": "operador"})
+    assert response.status_code == 200
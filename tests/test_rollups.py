@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+from server import rollup_category_key, rollup_increments
+
+
+def transaction(amount, type, category="Alimentação", month=10):
+    return {"amount": amount, "type": type, "category": category, "date": datetime(2026, month, 5, tzinfo=timezone.utc)}
+
+
+def test_rollup_increments_split_income_and_expense_by_month():
+    increments = rollup_increments([
+        transaction(100, "entrada", "Salário"),
+        transaction(30, "saida"),
+        transaction(20, "saida", month=9),
+    ], 1)
+    assert increments == {
+        "2026-10": {
+            "income": 100, "income_count": 1,
+            "expense": 30, "expense_count": 1,
+            "categories.Alimentação.total": 30, "categories.Alimentação.count": 1,
+        },
+        "2026-09": {
+            "expense": 20, "expense_count": 1,
+            "categories.Alimentação.total": 20, "categories.Alimentação.count": 1,
+        },
+    }
+
+
+def test_rollup_increments_cancel_out_for_unchanged_update():
+    before = transaction(30, "saida")
+    increments = rollup_increments([before], -1, rollup_increments([dict(before)], 1))
+    assert all(value == 0 for value in increments["2026-10"].values())
+
+
+def test_rollup_increments_move_between_categories():
+    increments = rollup_increments([transaction(30, "saida", "Lazer")], -1, rollup_increments([transaction(30, "saida", "Casa")], 1))
+    month = increments["2026-10"]
+    assert month["expense"] == 0
+    assert month["categories.Casa.total"] == 30
+    assert month["categories.Lazer.total"] == -30
+
+
+def test_rollup_category_key_escapes_mongo_path_characters():
+    assert rollup_category_key("a.b$c%d") == "a%2Eb%24c%25d"
+    increments = rollup_increments([transaction(5, "saida", "Pet.shop")], 1)
+    assert "categories.Pet%2Eshop.total" in increments["2026-10"]
+
+
+async def create_transactions(client, *amounts):
+    ids = []
+    for amount in amounts:
+        response = await client.post("/api/transactions", json={
+            "amount": amount,
+            "date": "2026-10-05T00:00:00+00:00",
+            "type": "saida",
+            "category": "Alimentação",
+            "description": "Mercado"
+        })
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def budget_counters(user_id):
+    counters = await server.db.budget_counters.find({"user_id": user_id, "count": {"$ne": 0}}, {"_id": 0}).to_list(None)
+    return sorted((c["period"], c["bucket"], c["category"], c["spent"], c["count"]) for c in counters)
+
+
+async def assert_aggregates_in_sync(user_id):
+    assert await server.verify_rollups(user_id) == []
+    counters = await budget_counters(user_id)
+    await server.rebuild_budget_counters(user_id)
+    assert counters == await budget_counters(user_id)
+
+
+@pytest.mark.anyio
+async def test_batch_update_and_delete_keep_aggregates_in_sync(client, user):
+    ids = await create_transactions(client, 10, 20, 30)
+    response = await client.post("/api/transactions/batch-update", json={
+        "transaction_ids": ids + ["missing"],
+        "update": {"category": "Lazer"}
+    })
+    assert response.json()["processed"] == 3
+    assert [r["status"] for r in response.json()["results"]] == ["updated"] * 3 + ["not_found"]
+    await assert_aggregates_in_sync(user.id)
+    
+    response = await client.post("/api/transactions/batch-delete", json={"transaction_ids": ids[:2]})
+    assert response.json()["processed"] == 2
+    await assert_aggregates_in_sync(user.id)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("endpoint, body", [
+    ("batch-update", {"update": {"category": "Lazer"}}),
+    ("batch-delete", {}),
+])
+async def test_batch_write_retries_rows_changed_after_the_read(client, user, monkeypatch, endpoint, body):
+    ids = await create_transactions(client, 10, 20, 30)
+    find_owned = server.find_owned_transactions
+    
+    async def find_then_concurrent_edit(user_id, transaction_ids):
+        found = await find_owned(user_id, transaction_ids)
+        monkeypatch.setattr(server, "find_owned_transactions", find_owned)
+        # another request edits a row between this batch's read and its write
+        response = await client.put(f"/api/transactions/{ids[0]}", json={"amount": 15})
+        assert response.status_code == 200
+        return found
+    
+    monkeypatch.setattr(server, "find_owned_transactions", find_then_concurrent_edit)
+    response = await client.post(f"/api/transactions/{endpoint}", json={"transaction_ids": ids, **body})
+    assert response.json()["processed"] == 3
+    await assert_aggregates_in_sync(user.id)
+
+
+@pytest.mark.anyio
+async def test_inconsistent_batch_rebuild_keeps_concurrent_writes(client, user, monkeypatch):
+    ids = await create_transactions(client, 10, 20, 30)
+    await server.db.monthly_rollups.insert_one({"user_id": user.id, "month": "1999-01", "expense": 5, "expense_count": 1})
+    record = server.record_batch_changes
+    compute = server.compute_rollups
+    
+    async def record_inconsistent(user_id, consistent, **changes):
+        await record(user_id, False, **changes)
+    
+    async def compute_then_concurrent_write(user_id=None):
+        rollups = await compute(user_id)
+        monkeypatch.setattr(server, "compute_rollups", compute)
+        # another request adds a transaction between the rebuild's read and its replace
+        await create_transactions(client, 40)
+        return rollups
+    
+    monkeypatch.setattr(server, "record_batch_changes", record_inconsistent)
+    monkeypatch.setattr(server, "compute_rollups", compute_then_concurrent_write)
+    response = await client.post("/api/transactions/batch-delete", json={"transaction_ids": ids[:1]})
+    assert response.json()["processed"] == 1
+    
+    await assert_aggregates_in_sync(user.id)
+    rollups = await server.db.monthly_rollups.find({"user_id": user.id}, {"_id": 0}).to_list(None)
+    assert [(r["month"], r["expense"], r["expense_count"]) for r in rollups] == [("2026-10", 90, 3)]
@@ -0,0 +1,79 @@
+import pytest
+
+import server
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+@pytest.fixture
+def aggregate(db, monkeypatch):
+    # mongomock has no $text; record the pipeline and answer with canned scored rows
+    calls = []
+    docs = [{"id": f"t{i}", "description": "Padaria", "score": 2.0 - i * 0.5} for i in range(3)]
+
+    def fake_aggregate(collection, pipeline):
+        calls.append(pipeline)
+        return FakeCursor(docs)
+
+    # collections are wrapped per attribute access, so patch the wrapper class
+    monkeypatch.setattr(type(db.transactions), "aggregate", fake_aggregate)
+    return calls
+
+
+def test_text_index_is_scoped_to_the_user_and_uses_the_search_language():
+    index = next(i.document for i in server.INDEXES["transactions"] if i.document["name"] == "user_id_text")
+    assert list(index["key"].items()) == [("user_id", 1), ("description", "text"), ("category", "text")]
+    assert index["default_language"] == server.SEARCH_LANGUAGE == "portuguese"
+    assert index["weights"] == {"description": 2, "category": 1}
+
+
+@pytest.mark.anyio
+async def test_search_matches_text_for_the_user_ranked_by_score(client, user, aggregate):
+    response = await client.get("/api/search", params={
+        "q": "pão de açúcar", "type": "saida", "category": "Alimentação", "min_amount": 5, "end_date": "2026-11-01T00:00:00Z", "limit": 2
+    })
+    assert response.status_code == 200
+    match, add_score, sort, limit, project = aggregate[0]
+    assert match["$match"]["user_id"] == user.id
+    assert match["$match"]["$text"] == {"$search": "pão de açúcar", "$language": "portuguese"}
+    assert match["$match"]["type"] == "saida"
+    assert match["$match"]["category"] == "Alimentação"
+    assert match["$match"]["amount"] == {"$gte": 5}
+    assert set(match["$match"]["date"]) == {"$lt"}
+    assert add_score == {"$addFields": {"score": {"$meta": "textScore"}}}
+    assert sort == {"$sort": {"score": -1, "id": 1}}
+    assert limit == {"$limit": 3}
+    assert project["$project"]["score"] == 1
+
+    assert [t["id"] for t in response.json()] == ["t0", "t1"]
+    cursor = response.headers["X-Next-Cursor"]
+    await client.get("/api/search", params={"q": "pão", "cursor": cursor})
+    assert aggregate[1][2] == {"$match": {"$or": [{"score": {"$lt": 1.5}}, {"score": 1.5, "id": {"$gt": "t1"}}]}}
+
+
+@pytest.mark.anyio
+async def test_search_rejects_malformed_cursor(client, aggregate):
+    response = await client.get("/api/search", params={"q": "pão", "cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+@pytest.mark.anyio
+async def test_partial_words_are_extended_with_the_users_known_words(client, db, user, aggregate):
+    for description in ("Mercado Central", "Mercado Central", "Mercearia São José", "Supermercado"):
+        response = await client.post("/api/transactions", json={
+            "amount": 10, "date": "2026-10-05T00:00:00+00:00", "type": "saida", "category": "Alimentação", "description": description
+        })
+        assert response.status_code == 200
+    await db.search_terms.insert_one({"user_id": "outro-usuario", "field": "description", "key": "mercadinho", "count": 1})
+
+    await client.get("/api/search", params={"q": "Merc"})
+    assert aggregate[0][0]["$match"]["$text"]["$search"] == "Merc mercado mercearia"
+
+    await client.get("/api/search", params={"q": "mercado -jos"})
+    assert aggregate[1][0]["$match"]["$text"]["$search"] == "mercado -jos"
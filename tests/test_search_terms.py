@@ -0,0 +1,45 @@
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+@pytest.mark.anyio
+async def test_suggest_ranks_beyond_the_scan_window(client, user):
+    now = datetime.now(timezone.utc)
+    await server.db.search_terms.insert_many([
+        {"user_id": user.id, "field": "description", "key": f"aa{i:03d}", "term": f"aa{i:03d}", "count": 1, "last_used": now}
+        for i in range(server.SUGGEST_SCAN_LIMIT + 50)
+    ] + [{"user_id": user.id, "field": "description", "key": "azeite", "term": "Azeite", "count": 40, "last_used": now}])
+    suggestions = (await client.get("/api/search/suggest", params={"q": "a"})).json()
+    assert suggestions[0]["text"] == "Azeite"
+
+
+@pytest.mark.anyio
+async def test_deleting_latest_use_restores_previous_prefill(client):
+    async def create(amount, date, category):
+        response = await client.post("/api/transactions", json={
+            "amount": amount, "date": date, "type": "saida", "category": category, "description": "Feira"
+        })
+        return response.json()["id"]
+    
+    await create(30, "2026-09-01T00:00:00+00:00", "Alimentação")
+    latest = await create(80, "2026-10-01T00:00:00+00:00", "Lazer")
+    suggestion = (await client.get("/api/search/suggest", params={"q": "fei", "field": "description"})).json()[0]
+    assert (suggestion["amount"], suggestion["category"], suggestion["count"]) == (80, "Lazer", 2)
+    
+    await client.delete(f"/api/transactions/{latest}")
+    suggestion = (await client.get("/api/search/suggest", params={"q": "fei", "field": "description"})).json()[0]
+    assert (suggestion["amount"], suggestion["category"], suggestion["count"]) == (30, "Alimentação", 1)
+
+
+@pytest.mark.anyio
+async def test_older_transaction_keeps_latest_prefill(client):
+    for amount, date, category in ((80, "2026-10-01T00:00:00+00:00", "Lazer"), (30, "2026-01-01T00:00:00+00:00", "Alimentação")):
+        response = await client.post("/api/transactions", json={
+            "amount": amount, "date": date, "type": "saida", "category": category, "description": "Feira"
+        })
+        assert response.status_code == 200
+    suggestion = (await client.get("/api/search/suggest", params={"q": "fei", "field": "description"})).json()[0]
+    assert (suggestion["amount"], suggestion["category"], suggestion["count"]) == (80, "Lazer", 2)
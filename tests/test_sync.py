@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import server
+
+
+async def create_transaction(client, description="Mercado"):
+    response = await client.post("/api/transactions", json={
+        "amount": 10,
+        "date": "2026-10-01T00:00:00+00:00",
+        "type": "saida",
+        "category": "Alimentação",
+        "description": description
+    })
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+@pytest.mark.anyio
+async def test_sync_returns_changes_since_token(client):
+    first = await create_transaction(client)
+    token = (await client.get("/api/sync")).json()["token"]
+    
+    second = await create_transaction(client, "Padaria")
+    assert (await client.delete(f"/api/transactions/{first}")).status_code == 200
+    
+    delta = (await client.get("/api/sync", params={"since": token})).json()
+    assert delta["full"] is False
+    assert delta["has_more"] is False
+    assert [t["id"] for t in delta["changes"]["transactions"]] == [second]
+    assert delta["deleted"]["transactions"] == [first]
+    
+    empty = (await client.get("/api/sync", params={"since": delta["token"]})).json()
+    assert empty["token"] == delta["token"]
+    assert empty["changes"]["transactions"] == [] and empty["deleted"]["transactions"] == []
+
+
+@pytest.mark.anyio
+async def test_sync_token_ahead_of_version_is_gone(client):
+    await create_transaction(client)
+    response = await client.get("/api/sync", params={"since": 99})
+    assert response.status_code == 410
+
+
+@pytest.mark.anyio
+async def test_sync_gap_in_change_log(client, user):
+    await create_transaction(client)
+    await create_transaction(client)
+    await create_transaction(client)
+    
+    # a fresh gap may still be filled by an in-flight write
+    await server.db.change_log.delete_one({"user_id": user.id, "seq": 2})
+    recent = (await client.get("/api/sync", params={"since": 0})).json()
+    assert recent["token"] == 1
+    assert recent["has_more"] is True
+    
+    # once it is older than the grace period the history is considered expired
+    old = datetime.now(timezone.utc) - timedelta(seconds=server.SYNC_GAP_GRACE_SECONDS + 1)
+    await server.db.change_log.update_many({"user_id": user.id}, {"$set": {"at": old}})
+    assert (await client.get("/api/sync", params={"since": 0})).status_code == 410
+
+
+@pytest.mark.anyio
+async def test_sync_expired_history(client, user):
+    await create_transaction(client)
+    await create_transaction(client)
+    old = datetime.now(timezone.utc) - timedelta(days=1)
+    await server.db.change_log.delete_many({"user_id": user.id})
+    await server.db.users.update_one({"id": user.id}, {"$set": {"data_version_at": old}})
+    assert (await client.get("/api/sync", params={"since": 0})).status_code == 410
+
+
+@pytest.mark.anyio
+async def test_sync_delta_pages_through_has_more(client, monkeypatch):
+    token = (await client.get("/api/sync")).json()["token"]
+    created = [await create_transaction(client, f"Compra {i}") for i in range(5)]
+    monkeypatch.setattr(server, "SYNC_BATCH_SIZE", 2)
+    
+    seen = []
+    while True:
+        delta = (await client.get("/api/sync", params={"since": token})).json()
+        assert len(delta["changes"]["transactions"]) <= 2
+        seen.extend(t["id"] for t in delta["changes"]["transactions"])
+        token = delta["token"]
+        if not delta["has_more"]:
+            break
+    assert seen == created
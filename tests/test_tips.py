@@ -0,0 +1,70 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def llm(db, monkeypatch):
+    calls = []
+    
+    async def request_llm_tips(key, prompt):
+        calls.append(key)
+        await server.tips_cache.set(key, f"dicas {len(calls)}")
+        return f"dicas {len(calls)}"
+    
+    monkeypatch.setattr(server, "request_llm_tips", request_llm_tips)
+    monkeypatch.setattr(server, "tips_cache", server.MemoryTipsCache(100, 3600))
+    monkeypatch.setattr(server, "tips_llm_limiter", server.RateLimiter(0))
+    monkeypatch.setattr(server, "TIPS_PRECOMPUTE_CONCURRENCY", 1)
+    return calls
+
+
+async def insert_active_users(count):
+    for i in range(count):
+        user = server.User(email=f"ativo{i}@meufluxo.dev", name="Ativo", password_hash="x")
+        await server.db.users.insert_one({**user.model_dump(), "last_active_at": datetime.now(timezone.utc)})
+
+
+@pytest.mark.anyio
+async def test_cache_hits_do_not_spend_the_call_budget(llm, monkeypatch):
+    monkeypatch.setattr(server, "TIPS_PRECOMPUTE_MAX_CALLS", 3)
+    await insert_active_users(2)
+    # both users have the same (empty) numbers, so the second one is served from the cache
+    assert await server.precompute_tips() == 6
+    assert len(llm) == 3
+
+
+@pytest.mark.anyio
+async def test_precompute_runs_once_across_workers(llm):
+    await insert_active_users(1)
+    generated = await asyncio.gather(*(server.precompute_tips() for _ in range(3)))
+    assert sorted(generated) == [0, 0, 3]
+    assert len(llm) == 3
+
+
+@pytest.mark.anyio
+async def test_concurrent_requests_for_the_same_key_share_one_llm_call(client, monkeypatch):
+    calls = []
+
+    class FakeChat:
+        def __init__(self, **kwargs):
+            pass
+
+        def with_model(self, provider, model):
+            return self
+
+        async def send_message(self, message):
+            calls.append(message)
+            # stay in flight long enough for every request to reach single_flight
+            await asyncio.sleep(0.1)
+            return "dicas"
+
+    monkeypatch.setattr(server, "LlmChat", FakeChat)
+    monkeypatch.setattr(server, "tips_cache", server.MemoryTipsCache(100, 3600))
+    responses = await asyncio.gather(*(client.post("/api/tips", json={"period": "month"}) for _ in range(5)))
+    assert [response.json()["tips"] for response in responses] == ["dicas"] * 5
+    assert len(calls) == 1
+    assert server.tips_in_flight == {}